@@ -55,7 +55,7 @@ def asgrid(grid):
 class grid:
 
     def __init__(self, filename=None, nc=None, lat=None, lon=None, z=None,
-                 depths=True, cgrid=False):
+                 depths=True, cgrid=False, cache=None):
         """
             Class to wrap around a numerical model grid for oceanography.
             It attempts to track latitude, longitude, z, and other
@@ -82,6 +82,11 @@ class grid:
                 Set the depths of the grid [True]
             cgrid: bool,
                 Whether the grid is an Arakawa C-Grid [False]
+            cache: string,
+                Directory to store the derived fields (depths, thicknesses,
+                and metrics) of the grid. If the fields for this grid were
+                already stored, they are memory-mapped rather than
+                recomputed [None]
         """
         self.filename = filename
         self.cgrid = cgrid
@@ -103,9 +108,13 @@ class grid:
             self.cgrid = False
         self._verify_shape()
         if depths:
+            cached = self._load_cache(cache) if cache else False
             self.set_dims()
-            self.set_depth()
-            self.set_thickness()
+            if not cached:
+                self.set_depth()
+                self.set_thickness()
+                if cache:
+                    self._save_cache(cache)
             self.set_mask_h()
         self.ijinterp = None
         self.llinterp = None
@@ -181,6 +190,95 @@ class grid:
             self._nc.close()
             self._nc = None
 
+    # Derived fields that are stored in the cache
+    _cache_fields = ("s_rho", "cs_r", "pm", "pn", "depth_rho", "depth_u",
+                     "depth_v", "thick_rho", "thick_u", "thick_v")
+
+    def _cache_key(self):
+        """
+        PRIVATE method: Compute the key for the cache of derived fields from
+        the path, size, and modification time of the grid file and the
+        vertical parameters, so that the file itself need not be read.
+        """
+        import hashlib
+
+        files = self.filename
+        if files is None and self._nc is not None:
+            files = self._nc.filepath()
+        if files is None:
+            return None
+        key = hashlib.sha1()
+        for file in sorted(np.atleast_1d(files)):
+            st = os.stat(file)
+            key.update("{:s}:{:d}:{:d};".format(
+                os.path.abspath(file), st.st_size,
+                st.st_mtime_ns).encode())
+        for var in ("vtransform", "vstretching", "theta_s", "theta_b",
+                    "hc", "n"):
+            key.update("{:s}={:s};".format(
+                var, str(np.squeeze(getattr(self, var, None)))).encode())
+        return key.hexdigest()
+
+    def _load_cache(self, cache):
+        """
+        PRIVATE method: Memory-map the derived fields of the grid from the
+        cache directory. Returns True if the fields were loaded.
+        """
+        self._cache_dir = None
+        key = self._cache_key()
+        if key is None:
+            return False
+        self._cache_dir = os.path.join(cache, key)
+        if not os.path.isdir(self._cache_dir):
+            return False
+        for var in self._cache_fields:
+            file = os.path.join(self._cache_dir, var + ".npy")
+            if not os.path.isfile(file):
+                continue
+            data = np.load(file, mmap_mode="r")
+            shape = os.path.join(self._cache_dir, var + "_shape.npy")
+            if os.path.isfile(shape):
+                data = np.broadcast_to(data, tuple(np.load(shape)))
+            mask = os.path.join(self._cache_dir, var + "_mask.npy")
+            if os.path.isfile(mask):
+                data = np.ma.array(data, mask=np.load(mask, mmap_mode="r"),
+                                   copy=False)
+            self.__dict__[var] = data
+        return True
+
+    def _save_cache(self, cache):
+        """
+        PRIVATE method: Write the derived fields of the grid into the cache
+        directory. Fields that were read from the grid file are not stored.
+        """
+        import tempfile
+
+        if getattr(self, "_cache_dir", None) is None:
+            return
+        os.makedirs(cache, exist_ok=True)
+        # Write into a temporary directory first so that other processes
+        # never see a partial cache
+        tmpdir = tempfile.mkdtemp(dir=cache)
+        for var in self._cache_fields:
+            if var not in self.__dict__ or var in self.key:
+                continue
+            data = self.__dict__[var]
+            if np.ndim(data) and 0 in np.ma.getdata(data).strides:
+                # Store only the unique part of broadcast views
+                np.save(os.path.join(tmpdir, var + "_shape.npy"), data.shape)
+                data = data[tuple(slice(0, 1) if st == 0 else slice(None)
+                                  for st in np.ma.getdata(data).strides)]
+            np.save(os.path.join(tmpdir, var + ".npy"), np.ma.getdata(data))
+            if np.ma.isMaskedArray(data):
+                np.save(os.path.join(tmpdir, var + "_mask.npy"),
+                        np.ma.getmaskarray(data))
+        try:
+            os.rename(tmpdir, self._cache_dir)
+        except OSError:
+            # Another process created the cache first
+            import shutil
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
     def _verify_shape(self):
         """
         Verify the dimensionality of the system, create variables that
@@ -446,19 +544,22 @@ class grid:
                 l = np.nonzero(d > 0)
                 d[l] = -d[l]
                 if self.n > 1:
-                    self.depth_rho = np.kron(np.kron(
-                        d, np.ones(self.lon_rho.shape[1])),
-                        np.ones(self.lon_rho.shape[0])).reshape(
-                        [self.z.size, self.lon_rho.shape[0],
-                         self.lon_rho.shape[1]])
+                    # The depths are the same at every location, so use
+                    # read-only broadcast views rather than full arrays
+                    d = np.ma.getdata(d).ravel()[:, np.newaxis, np.newaxis]
+                    self.depth_rho = np.broadcast_to(d, (self.n,) + self.shape)
+                    self.depth_u = np.broadcast_to(d, (self.n,) + self.shape_u)
+                    self.depth_v = np.broadcast_to(d, (self.n,) + self.shape_v)
                 else:
                     self.depth_rho = self.z
-                if self.cgrid:
-                    self.depth_u = seapy.model.rho2u(self.depth_rho).filled(0)
-                    self.depth_v = seapy.model.rho2v(self.depth_rho).filled(0)
-                else:
-                    self.depth_u = self.depth_rho
-                    self.depth_v = self.depth_rho
+                    if self.cgrid:
+                        self.depth_u = seapy.model.rho2u(
+                            self.depth_rho).filled(0)
+                        self.depth_v = seapy.model.rho2v(
+                            self.depth_rho).filled(0)
+                    else:
+                        self.depth_u = self.depth_rho
+                        self.depth_v = self.depth_rho
         except (AttributeError, ValueError):
             warn("could not compute grid depths.")
             pass
@@ -499,21 +600,128 @@ class grid:
                     w[-1] = d[-1]
                     w[0:-1] = d[0:-1] - d[1:]
 
-                self.thick_rho = np.kron(np.kron(w,
-                                                 np.ones(self.lon_rho.shape[1])),
-                                         np.ones(self.lon_rho.shape[0])).reshape(
-                    [self.z.size, self.lon_rho.shape[0],
-                     self.lon_rho.shape[1]])
-                if self.cgrid:
-                    self.thick_u = seapy.model.rho2u(self.thick_rho)
-                    self.thick_v = seapy.model.rho2v(self.thick_rho)
-                else:
-                    self.thick_u = self.thick_rho
-                    self.thick_v = self.thick_rho
+                # As with the depths, the thicknesses are broadcast views
+                w = np.ma.getdata(w).ravel()[:, np.newaxis, np.newaxis]
+                self.thick_rho = np.broadcast_to(w, (self.n,) + self.shape)
+                self.thick_u = np.broadcast_to(w, (self.n,) + self.shape_u)
+                self.thick_v = np.broadcast_to(w, (self.n,) + self.shape_v)
         except AttributeError:
             warn("could not compute grid thicknesses.")
             pass
 
+    def subset(self, i_slice=None, j_slice=None):
+        """
+        Return a grid covering a sub-region of this grid. The fields of the
+        new grid are views into the fields of this grid (no data are
+        copied), and the u-, v-, and psi-grid fields are sliced to remain
+        consistent with the C-grid staggering of the rho-grid.
+
+        Parameters
+        ----------
+        i_slice : slice, optional
+            Range of the rho-grid in the xi-direction to keep. Default is all.
+        j_slice : slice, optional
+            Range of the rho-grid in the eta-direction to keep. Default is all.
+
+        Returns
+        -------
+        seapy.model.grid
+            The new grid. Its parent_slice attribute holds the (j, i) slices
+            of the rho-grid within this grid.
+
+        Examples
+        --------
+        >>> sub = grid.subset(np.s_[100:200], np.s_[50:150])
+        >>> sub.h.shape
+        (100, 100)
+        """
+        i_slice = np.s_[:] if i_slice is None else i_slice
+        j_slice = np.s_[:] if j_slice is None else j_slice
+        i0, i1, istep = i_slice.indices(self.lm)
+        j0, j1, jstep = j_slice.indices(self.ln)
+        if istep != 1 or jstep != 1:
+            raise ValueError("subset slices must have a step of 1")
+        if i1 - i0 < 2 or j1 - j0 < 2:
+            raise ValueError("subset must be at least 2x2 points")
+
+        # The staggered grids lose the last point in their direction
+        sl = {(self.ln, self.lm): np.s_[j0:j1, i0:i1],
+              (self.ln, self.lm - 1): np.s_[j0:j1, i0:i1 - 1],
+              (self.ln - 1, self.lm): np.s_[j0:j1 - 1, i0:i1],
+              (self.ln - 1, self.lm - 1): np.s_[j0:j1 - 1, i0:i1 - 1]}
+
+        sub = grid.__new__(grid)
+        for var, val in self.__dict__.items():
+            if isinstance(val, np.ndarray) and val.ndim >= 2 and \
+                    val.shape[-2:] in sl:
+                val = val[(Ellipsis,) + sl[val.shape[-2:]]]
+            sub.__dict__[var] = val
+
+        # Update the dimensions of the new grid
+        sub._nc = None
+        sub.ijinterp = None
+        sub.llinterp = None
+        sub._verify_shape()
+        if "eta_rho" in self.__dict__:
+            sub.eta_rho = sub.eta_u = sub.ln
+            sub.eta_v = sub.ln - 1
+            sub.xi_rho = sub.xi_v = sub.lm
+            sub.xi_u = sub.lm - 1
+        if "I" in self.__dict__:
+            sub.I, sub.J = np.meshgrid(np.arange(0, sub.lm),
+                                       np.arange(0, sub.ln))
+        sub.parent_slice = np.s_[j0:j1, i0:i1]
+        return sub
+
+    def tiles(self, ntile_i=1, ntile_j=1, halo=0):
+        """
+        Iterate over the grid in tiles. Each tile is a view-backed grid
+        (see :meth:`subset`) that includes a halo of points shared with
+        its neighbors so that each tile may be processed independently.
+
+        Parameters
+        ----------
+        ntile_i : int, optional
+            Number of tiles in the xi-direction
+        ntile_j : int, optional
+            Number of tiles in the eta-direction
+        halo : int, optional
+            Number of points to overlap into the neighboring tiles
+
+        Returns
+        -------
+        generator of seapy.model.grid
+            Each tile has the attributes:
+                parent_slice : (j, i) slices of the tile (including the
+                               halo) within this grid
+                interior : (j, i) slices of the tile that exclude the halo,
+                           relative to the tile itself
+
+        Examples
+        --------
+        Compute a field by tile and put it back together
+
+        >>> out = np.zeros(grid.shape)
+        >>> for tile in grid.tiles(4, 4, halo=2):
+        >>>     fld = process(tile)
+        >>>     out[tile.parent_slice][tile.interior] = fld[tile.interior]
+        """
+        ntile_i = int(np.clip(ntile_i, 1, self.lm // 2))
+        ntile_j = int(np.clip(ntile_j, 1, self.ln // 2))
+        halo = int(halo)
+        iedge = np.linspace(0, self.lm, ntile_i + 1).astype(int)
+        jedge = np.linspace(0, self.ln, ntile_j + 1).astype(int)
+        for j in range(ntile_j):
+            j0 = max(0, jedge[j] - halo)
+            j1 = min(self.ln, jedge[j + 1] + halo)
+            for i in range(ntile_i):
+                i0 = max(0, iedge[i] - halo)
+                i1 = min(self.lm, iedge[i + 1] + halo)
+                tile = self.subset(np.s_[i0:i1], np.s_[j0:j1])
+                tile.interior = np.s_[jedge[j] - j0:jedge[j + 1] - j0,
+                                      iedge[i] - i0:iedge[i + 1] - i0]
+                yield tile
+
     def plot_trace(self, basemap=None, **kwargs):
         """
         Trace the boundary of the grid onto a map projection
@@ -749,7 +957,7 @@ class grid:
         fill_value = 0 if depth_adjust else np.nan
         for n in idx:
             pts = np.where(np.logical_and(jj == jj[n], ii == ii[n]))
-            griddep = self.depth_rho[:, jj[n], ii[n]]
+            griddep = np.array(self.depth_rho[:, jj[n], ii[n]])
             if griddep[0] < griddep[-1]:
                 griddep[-1] = 0.0
             else:
@@ -853,6 +1061,56 @@ class grid:
 
         return dHdxi, dHdeta
 
+    def _scanline_fill(self, polys, radius=0.0):
+        """
+        PRIVATE method: Rasterize polygons given in fractional (j, i) index
+        space onto the rho-grid using the even-odd rule along each row. The
+        polygons are grown by radius along each row, and then the rows are
+        dilated by radius across them.
+        """
+        diff = np.zeros((self.ln, self.lm + 1), dtype=np.int32)
+        for poly in polys:
+            y0 = poly[:, 0]
+            x0 = poly[:, 1]
+            y1 = np.roll(y0, -1)
+            x1 = np.roll(x0, -1)
+
+            # Each edge crosses the rows from ceil(ymin) up to (but not
+            # including) ymax, which avoids counting vertices twice
+            ymin = np.minimum(y0, y1)
+            ymax = np.maximum(y0, y1)
+            jlo = np.maximum(np.ceil(ymin), 0).astype(int)
+            jhi = np.minimum(np.ceil(ymax) - 1, self.ln - 1).astype(int)
+            nrows = np.maximum(jhi - jlo + 1, 0)
+            if not nrows.sum():
+                continue
+            edge = np.repeat(np.arange(y0.size), nrows)
+            row = jlo[edge] + np.arange(edge.size) - \
+                np.repeat(np.cumsum(nrows) - nrows, nrows)
+            x = x0[edge] + (row - y0[edge]) * (x1[edge] - x0[edge]) / \
+                (y1[edge] - y0[edge])
+
+            # Sort the crossings along each row and fill between the pairs
+            order = np.lexsort((x, row))
+            row = row[order]
+            x = x[order]
+            start = np.clip(np.ceil(x[0::2] - radius), 0, self.lm).astype(int)
+            stop = np.clip(np.floor(x[1::2] + radius) + 1,
+                           0, self.lm).astype(int)
+            l = start < stop
+            np.add.at(diff, (row[0::2][l], start[l]), 1)
+            np.add.at(diff, (row[0::2][l], stop[l]), -1)
+        inside = np.cumsum(diff, axis=1)[:, :-1] > 0
+
+        # Grow the filled rows into their neighbors within the radius
+        pad = int(np.floor(radius))
+        if pad > 0:
+            from scipy.ndimage import binary_dilation
+            inside = binary_dilation(inside,
+                                     structure=np.ones((2 * pad + 1, 1),
+                                                       dtype=bool))
+        return inside
+
     def mask_poly(self, vertices, lat_lon=False, radius=0.0):
         """
         Create an np.masked_array of the same shape as the grid with values
@@ -860,11 +1118,16 @@ class grid:
 
         Parameters
         ----------
-        vertices: list of tuples,
-            points that define the vertices of the polygon
+        vertices: list of tuples, or list of lists of tuples
+            points that define the vertices of the polygon. If a list of
+            polygons is given, the points within any of them are kept.
         lat_lon : bool, optional,
             If True, the vertices are a list of lon, lat points rather
-            than indexes
+            than (j, i) indexes
+        radius : float, optional,
+            distance (in grid points) outside of the polygon edge that is
+            still considered to be inside. This is ignored for lon, lat
+            vertices that lie off of the grid.
 
         Returns
         -------
@@ -875,17 +1138,48 @@ class grid:
         --------
         >>> vertices = [ (1,2), (4,5), (1,3) ]
         >>> mask = grid.mask_poly(vertices)
+
+        Multiple polygons given in longitude and latitude
+
+        >>> islands = [[(-158, 21), (-157.6, 21.7), (-157.6, 21.2)],
+        >>>            [(-156, 19), (-154.8, 19.5), (-155.8, 20.3)]]
+        >>> mask = grid.mask_poly(islands, lat_lon=True)
         """
+        if np.ndim(vertices[0]) == 2:
+            polys = [np.asarray(v, dtype=float) for v in vertices]
+        else:
+            polys = [np.asarray(vertices, dtype=float)]
+
         # If lat/lon vertices are given, we need to put these onto
         # the grid coordinates
         if lat_lon:
-            points = self.ij(vertices, asint=True)
-            vertices = list(zip(points[0], points[1]))
-
-        # Now, with grid coordinates, test the grid against the vertices
-        poly = matplotlib.path.Path(vertices)
-        inside = poly.contains_points(np.vstack((self.J.flatten(),
-                                                 self.I.flatten())).T,
-                                      radius=radius)
-        return np.ma.masked_where(inside.reshape(self.lat_rho.shape),
-                                  np.ones(self.lat_rho.shape))
+            from seapy.external.hindices import hindices
+
+            ipolys = []
+            for poly in polys:
+                i, j = hindices(self.angle.T, self.lon_rho.T, self.lat_rho.T,
+                                poly[:, 0], poly[:, 1])
+                if np.any(i == -999.0) or np.any(j == -999.0):
+                    break
+                ipolys.append(np.column_stack((j, i)))
+            else:
+                polys = ipolys
+                lat_lon = False
+
+        if lat_lon:
+            # Some vertices lie off of the grid, so test the grid points
+            # in lon/lat, but only those within each polygon's bounds
+            inside = np.zeros(self.lat_rho.shape, dtype=bool)
+            for poly in polys:
+                box = np.nonzero(np.logical_and.reduce((
+                    self.lon_rho >= poly[:, 0].min(),
+                    self.lon_rho <= poly[:, 0].max(),
+                    self.lat_rho >= poly[:, 1].min(),
+                    self.lat_rho <= poly[:, 1].max())))
+                path = matplotlib.path.Path(poly)
+                inside[box] |= path.contains_points(
+                    np.column_stack((self.lon_rho[box], self.lat_rho[box])))
+        else:
+            inside = self._scanline_fill(polys, radius)
+
+        return np.ma.masked_where(~inside, np.ones(self.lat_rho.shape))
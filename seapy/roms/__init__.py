@@ -27,4 +27,6 @@ from . import obs
 from . import obsgen
 from . import tide
 from . import psource
+from . import qc
+from . import superob
 from .lib import *
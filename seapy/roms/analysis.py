@@ -528,6 +528,205 @@ def gen_std_f(roms_file, std_file, records=None, fields=None):
     nc.close()
 
 
+def _obs_indices(grid, obs, point, vertical):
+    """
+    PRIVATE method: compute the fractional grid indices of the
+    observations on the given point of the grid (rho, u, or v). The
+    vertical indices are only found where vertical is True.
+
+    Returns
+    -------
+    idx : tuple of ndarray,
+        lower (k, j, i) indices of the cell holding each observation
+    frac : tuple of ndarray,
+        fraction of the cell to each observation in (k, j, i)
+    good : ndarray,
+        True for the observations that lie within the grid
+    """
+    depth = getattr(grid, "depth_" + point)
+    n, ny, nx = depth.shape
+    x = obs.x - (0.5 if point == "u" else 0)
+    y = obs.y - (0.5 if point == "v" else 0)
+    i = np.clip(np.floor(x).astype(int), 0, nx - 2)
+    j = np.clip(np.floor(y).astype(int), 0, ny - 2)
+    fx, fy = x - i, y - j
+    good = np.logical_and.reduce((fx >= 0, fx <= 1, fy >= 0, fy <= 1))
+
+    # Observations with positive z are on a layer (counted from 1);
+    # otherwise, find the layers around the depth of the observation
+    kf = np.where(vertical, obs.z - 1, 0)
+    l = np.flatnonzero(np.logical_and.reduce((vertical, obs.z <= 0, good)))
+    for c in seapy.chunker(l, 100000):
+        w = ((1 - fx[c]) * (1 - fy[c]), fx[c] * (1 - fy[c]),
+             (1 - fx[c]) * fy[c], fx[c] * fy[c])
+        prof = (w[0] * depth[:, j[c], i[c]] + w[1] * depth[:, j[c], i[c] + 1] +
+                w[2] * depth[:, j[c] + 1, i[c]] +
+                w[3] * depth[:, j[c] + 1, i[c] + 1]).T
+        d = -np.abs(obs.depth[c])
+        below = np.sum(prof <= d[:, None], axis=1)
+        k = np.clip(below - 1, 0, n - 2)
+        p0 = np.take_along_axis(prof, k[:, None], axis=1)[:, 0]
+        p1 = np.take_along_axis(prof, k[:, None] + 1, axis=1)[:, 0]
+        kf[c] = np.where(below > 0, k + np.minimum((d - p0) / (p1 - p0), 1),
+                         np.nan)
+    k = np.clip(np.floor(np.nan_to_num(kf)).astype(int), 0, max(n - 2, 0))
+    fk = kf - k
+    good &= np.isfinite(fk)
+    return (k, j, i), (fk, fy, fx), good
+
+
+def _interp_cell(field, idx, frac):
+    """
+    PRIVATE method: interpolate the field (with nan for masked values)
+    within the grid cells given by idx and frac, using only the corners
+    of each cell that are valid
+    """
+    k, j, i = idx
+    fk, fy, fx = frac
+    total = 0
+    weight = 0
+    for dk, dj, di in np.ndindex(field.ndim - 1, 2, 2):
+        w = (fy if dj else 1 - fy) * (fx if di else 1 - fx)
+        if field.ndim == 3:
+            w = w * (fk if dk else 1 - fk)
+            v = field[k + dk, j + dj, i + di]
+        else:
+            v = field[j + dj, i + di]
+        ok = np.isfinite(v)
+        total = total + np.where(ok, v * w, 0)
+        weight = weight + np.where(ok, w, 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(weight > 0, total / weight, np.nan)
+
+
+def model_equivalent(obs, files, grid=None, epoch=None):
+    """
+    Compute the values of the model at the observations from a list of
+    ROMS history or average files. The observations are located on the
+    grid once, and the files are read in a single pass through time, only
+    loading the records that bracket the observations. The model is
+    interpolated trilinearly in space (within the layers of the grid at
+    rest) and linearly in time. Observations of zeta, ubar, vbar, u, v,
+    temp, and salt are computed.
+
+    Parameters
+    ----------
+    obs : seapy.roms.obs.obs or string,
+        observations to compute the model values for
+    files : string or list of strings,
+        ROMS output files to use
+    grid : seapy.model.grid or string, optional,
+        grid of the model. If None, it is loaded from the first file
+    epoch : datetime, optional,
+        reference time of the observation times. If None, the reference
+        time of the first file is used.
+
+    Returns
+    -------
+    model : ndarray,
+        value of the model at each observation; nan where it cannot be
+        computed (outside of the grid or the time of the files, or
+        of types that are not computed)
+
+    Examples
+    --------
+    Compute the innovations of a forecast
+
+    >>> obs = seapy.roms.obs.obs("obs_2010.nc")
+    >>> files = sorted(glob.glob("his_*.nc"))
+    >>> innov = obs.value - seapy.roms.analysis.model_equivalent(obs, files)
+    """
+    obs = seapy.roms.obs.asobs(obs)
+    files = list(np.atleast_1d(files))
+    grid = seapy.model.asgrid(grid if grid is not None else files[0])
+    model = np.full(len(obs), np.nan)
+
+    # Build the list of records in time
+    times = []
+    records = []
+    for n, f in enumerate(files):
+        with seapy.netcdf(f) as nc:
+            if epoch is None:
+                epoch = seapy.roms.get_reftime(nc)[0]
+            t = np.atleast_1d(seapy.roms.num2date(nc, epoch=epoch))
+        times.append(t)
+        records.append(np.column_stack((np.full(t.size, n),
+                                        np.arange(t.size))))
+    times = np.concatenate(times)
+    order = np.argsort(times, kind='mergesort')
+    times, u = np.unique(times[order], return_index=True)
+    records = np.vstack(records)[order][u]
+    if not times.size:
+        return model
+
+    # Find the records that bracket each observation
+    if times.size > 1:
+        r0 = np.clip(np.searchsorted(times, obs.time, side='right') - 1,
+                     0, times.size - 2)
+        r1 = r0 + 1
+        wt = (obs.time - times[r0]) / (times[r1] - times[r0])
+    else:
+        r0 = r1 = np.zeros(len(obs), dtype=int)
+        wt = np.where(obs.time == times[0], 0.0, np.nan)
+    good = np.logical_and(wt >= 0, wt <= 1)
+
+    # Locate the observations on the grid for each type
+    variable = {}
+    idx = [np.zeros(len(obs), dtype=int) for _ in range(3)]
+    frac = [np.zeros(len(obs)) for _ in range(3)]
+    for t in np.unique(obs.type):
+        name = seapy.roms.obs.obs_types.get(t, "").lower()
+        if name not in ("zeta", "ubar", "vbar", "u", "v", "temp", "salt"):
+            good[obs.type == t] = False
+            continue
+        variable[t] = name
+    for point in ("rho", "u", "v"):
+        l = np.flatnonzero(np.logical_and(good, np.isin(obs.type, [
+            t for t, v in variable.items()
+            if (v[0] if v[0] in "uv" else "rho") == point])))
+        if not l.size:
+            continue
+        vertical = np.isin(obs.type[l], [t for t, v in variable.items()
+                                         if v in ("u", "v", "temp", "salt")])
+        i, f, ok = _obs_indices(grid, obs[l], point, vertical)
+        for n in range(3):
+            idx[n][l] = i[n]
+            frac[n][l] = f[n]
+        good[l[~ok]] = False
+    model[good] = 0
+
+    # Pair each observation with the records around it (skipping any that
+    # have no weight) and group them by record and type
+    l = np.flatnonzero(good)
+    use0 = wt[l] < 1
+    use1 = wt[l] > 0
+    ob = np.concatenate((l[use0], l[use1]))
+    rec = np.concatenate((r0[l][use0], r1[l][use1]))
+    w = np.concatenate((1 - wt[l][use0], wt[l][use1]))
+    srt = np.lexsort((obs.type[ob], rec))
+    ob, rec, w = ob[srt], rec[srt], w[srt]
+    start = np.flatnonzero(np.r_[True, (np.diff(rec) != 0) |
+                                 (np.diff(obs.type[ob]) != 0)])
+
+    # Stream through the records, accumulating the model values
+    nc = None
+    for s0, s1 in zip(start, np.r_[start[1:], ob.size]):
+        fn, r = records[rec[s0]]
+        if nc is None or fn != current:
+            if nc is not None:
+                nc.close()
+            nc = seapy.netcdf(files[fn])
+            current = fn
+        o = ob[s0:s1]
+        field = np.ma.filled(nc.variables[variable[obs.type[o[0]]]][r]
+                             .astype(float), np.nan)
+        model[o] += w[s0:s1] * _interp_cell(field, [x[o] for x in idx],
+                                            [x[o] for x in frac])
+    if nc is not None:
+        nc.close()
+    return model
+
+
 def plot_obs_spatial(obs, type='zeta', prov=None, time=None, depth=0,
                      gridcoord=False, error=False, **kwargs):
     """
@@ -11,6 +11,7 @@ from datetime import datetime
 import netCDF4
 import seapy
 from collections import namedtuple
+from warnings import warn
 
 
 def create_grid(grid_file, lat, lon):
@@ -287,3 +288,195 @@ def calc_latlon(llcrnrlat, llcrnrlon, reseta, resxi=None, rotate=0):
     lat[-1, -1] = lat[-2, -1] + edy
 
     return lat, lon
+
+
+def _rx0_bound(h, wet_u, wet_v, factor):
+    """
+    PRIVATE method: Compute the minimum depth allowed at each point given
+    the depths of its wet neighbors (0 where there are no wet neighbors).
+    """
+    hf = h * factor
+    bound = np.zeros(h.shape)
+    np.maximum(bound[:, :-1], np.where(wet_u, hf[:, 1:], 0),
+               out=bound[:, :-1])
+    np.maximum(bound[:, 1:], np.where(wet_u, hf[:, :-1], 0),
+               out=bound[:, 1:])
+    np.maximum(bound[:-1, :], np.where(wet_v, hf[1:, :], 0),
+               out=bound[:-1, :])
+    np.maximum(bound[1:, :], np.where(wet_v, hf[:-1, :], 0),
+               out=bound[1:, :])
+    return bound
+
+
+def smooth_rx0(grid, rx0=0.2, hmin=None, max_iter=100000, verbose=False):
+    """
+    Smooth the bathymetry of a grid until the r-factor (rx0) between every
+    pair of adjacent water points is no larger than the given value. This
+    uses the method of Martinho and Batteen (2006): whenever a pair of
+    points exceeds the limit, the shallower point is deepened. Land points
+    are not modified and are not used in the smoothing.
+
+    Each iteration is computed over the whole array at once, and only the
+    region around the points that changed during the previous iteration is
+    considered again.
+
+    Parameters
+    ----------
+    grid : seapy.model.grid or string
+      The grid to smooth. It must have h and mask_rho.
+    rx0 : float, optional
+      The maximum r-factor to allow
+    hmin : float, optional
+      If given, the minimum depth of the water points
+    max_iter : int, optional
+      The maximum number of iterations to perform
+    verbose : bool, optional
+      If True, display the progress of the smoothing
+
+    Returns
+    -------
+    h : ndarray
+      The smoothed bathymetry
+    iterations : int
+      The number of iterations used
+
+    Examples
+    --------
+    >>> h, n = seapy.roms.ezgrid.smooth_rx0("grid.nc", rx0=0.15, hmin=5)
+    >>> grid.h = h
+    >>> grid.rfactor().max()
+    0.15
+    """
+    grid = seapy.model.asgrid(grid)
+    h = np.array(np.ma.getdata(grid.h), dtype=float)
+    wet = np.ma.getdata(grid.mask_rho) > 0
+    wet_u = np.logical_and(wet[:, 1:], wet[:, :-1])
+    wet_v = np.logical_and(wet[1:, :], wet[:-1, :])
+    if hmin is not None:
+        h[wet] = np.maximum(h[wet], hmin)
+    factor = (1.0 - rx0) / (1.0 + rx0)
+
+    # Start with the entire grid, then shrink to the region of change
+    ln, lm = h.shape
+    j0, j1, i0, i1 = 0, ln, 0, lm
+    for it in range(1, max_iter + 1):
+        hw = h[j0:j1, i0:i1]
+        bound = _rx0_bound(hw, wet_u[j0:j1, i0:i1 - 1],
+                           wet_v[j0:j1 - 1, i0:i1], factor)
+        change = bound > hw
+        nchange = np.count_nonzero(change)
+        if verbose and (it % 100 == 0 or not nchange):
+            print("iteration {:d}: {:d} points deepened".format(it, nchange))
+        if not nchange:
+            break
+        hw[change] = bound[change]
+
+        # Only the neighbors of points that changed need to be examined
+        jj = np.nonzero(np.any(change, axis=1))[0]
+        ii = np.nonzero(np.any(change, axis=0))[0]
+        j0, j1 = max(j0 + jj[0] - 1, 0), min(j0 + jj[-1] + 2, ln)
+        i0, i1 = max(i0 + ii[0] - 1, 0), min(i0 + ii[-1] + 2, lm)
+    else:
+        warn("smooth_rx0 did not converge in {:d} iterations".format(max_iter))
+
+    return h, it
+
+
+def uvp_masks(mask_rho):
+    """
+    Compute the u-, v-, and psi-grid masks from the rho-grid mask as is
+    done within ROMS.
+
+    Parameters
+    ----------
+    mask_rho : ndarray
+      The mask of the rho-grid (1 for water, 0 for land)
+
+    Returns
+    -------
+    mask_u, mask_v, mask_psi : ndarray
+      The masks of the u-, v-, and psi-grids
+    """
+    mask_rho = np.asarray(mask_rho)
+    mask_u = mask_rho[:, 1:] * mask_rho[:, :-1]
+    mask_v = mask_rho[1:, :] * mask_rho[:-1, :]
+    mask_psi = mask_u[1:, :] * mask_u[:-1, :]
+    return mask_u, mask_v, mask_psi
+
+
+def clean_mask(grid, min_size=None, bays=True, channels=True):
+    """
+    Clean the land/sea mask of a grid. Water points that are cut off from
+    the rest of the domain by only having a single open face (bays) or that
+    lie between land on opposite sides (one-cell wide channels) are turned
+    to land as these give degenerate u- and v-grid masks. Afterward, any
+    water bodies that are not connected to the others (through the u- or
+    v-faces) and are smaller than the given size are removed.
+
+    Points beyond the edges of the grid are considered water so that open
+    boundaries are not affected.
+
+    Parameters
+    ----------
+    grid : seapy.model.grid, string, or ndarray
+      The grid (or rho-grid mask array) to clean
+    min_size : int, optional
+      The minimum number of points for a water body to be kept. If not
+      specified, only the largest water body is kept.
+    bays : bool, optional
+      If True, fill water points with three or four land neighbors
+    channels : bool, optional
+      If True, fill water points that have land on both sides in either
+      the xi- or eta-direction
+
+    Returns
+    -------
+    mask_rho, mask_u, mask_v, mask_psi : ndarray
+      The cleaned masks for each of the grids
+
+    Examples
+    --------
+    >>> grid = seapy.model.asgrid("grid.nc")
+    >>> grid.mask_rho, grid.mask_u, grid.mask_v, _ = \
+    >>>     seapy.roms.ezgrid.clean_mask(grid, min_size=50)
+    """
+    from scipy import ndimage
+
+    if isinstance(grid, np.ndarray):
+        wet = np.ma.getdata(grid) > 0
+    else:
+        wet = np.ma.getdata(seapy.model.asgrid(grid).mask_rho) > 0
+
+    # Fill the bays and channels. Filling one point may create a new bay
+    # next to it, so continue until nothing changes.
+    while bays or channels:
+        pad = np.pad(wet, 1, mode="constant", constant_values=True)
+        east, west = pad[1:-1, 2:], pad[1:-1, :-2]
+        north, south = pad[2:, 1:-1], pad[:-2, 1:-1]
+        fill = np.zeros(wet.shape, dtype=bool)
+        if bays:
+            nwet = east.view(np.int8) + west.view(np.int8) + \
+                north.view(np.int8) + south.view(np.int8)
+            fill |= nwet <= 1
+        if channels:
+            fill |= np.logical_and(~east, ~west)
+            fill |= np.logical_and(~north, ~south)
+        fill &= wet
+        if not np.any(fill):
+            break
+        wet[fill] = False
+
+    # Remove the isolated water bodies
+    labels, nlabels = ndimage.label(wet)
+    if nlabels > 1:
+        size = np.bincount(labels.ravel())
+        size[0] = 0
+        if min_size is None:
+            keep = size == size.max()
+        else:
+            keep = size >= min_size
+        keep[0] = False
+        wet = keep[labels]
+
+    mask_rho = wet.astype(float)
+    return (mask_rho,) + uvp_masks(mask_rho)
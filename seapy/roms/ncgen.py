@@ -184,6 +184,8 @@ def add_variable(nc, var):
             dims: comma separated string of dimensions ("ocean_time, eta_rho")
             attr: dictionary of variable attributes where the key is
                   the attribute name and the value is the attribute string
+            zlib, complevel, shuffle, chunksizes: optional storage
+                  settings passed to netCDF4 createVariable
 
     Returns
     -------
@@ -209,8 +211,10 @@ def add_variable(nc, var):
         dims = var['dims'].replace(" ", "").split(',')
     except:
         dims = var['dims']
+    opts = {k: var[k] for k in ("zlib", "complevel", "shuffle", "chunksizes")
+            if k in var}
     try:
-        nvar = nc.createVariable(var["name"], var["type"], dims)
+        nvar = nc.createVariable(var["name"], var["type"], dims, **opts)
     except:
         nvar = nc.createVariable(var["name"], var["type"])
 
@@ -954,7 +958,8 @@ def create_nudge_coef(filename, eta_rho=10, xi_rho=10, s_rho=1, clobber=False,
 
 
 def create_da_obs(filename, state_variable=20, survey=1, provenance=None,
-                  clobber=False, cdl=None, title="My Observations"):
+                  clobber=False, cdl=None, title="My Observations",
+                  compress=False):
     """
     Create an assimilation observations file
 
@@ -978,6 +983,11 @@ def create_da_obs(filename, state_variable=20, survey=1, provenance=None,
         netCDF file.
     title: string, optional
         netcdf attribute title
+    compress: bool, optional
+        If True, create a NETCDF4 file with compressed, chunked
+        observations and an unlimited survey dimension so that surveys
+        can be appended. Otherwise, create a NETCDF3_64BIT file with a
+        fixed survey dimension.
 
     Returns
     -------
@@ -991,8 +1001,14 @@ def create_da_obs(filename, state_variable=20, survey=1, provenance=None,
         _cdl_dir + "s4dvar_obs.cdl" if cdl is None else cdl)
 
     # Fill in the appropriate dimension values
-    dims["survey"] = survey
+    dims["survey"] = 0 if compress else survey
     dims["state_variable"] = state_variable
+    if compress:
+        for v in vars:
+            if "datum" in v["dims"]:
+                v.update(zlib=True, shuffle=True, chunksizes=(32768,))
+            elif "survey" in v["dims"]:
+                v.update(chunksizes=(1024,))
 
     # Set the provenance values in the global attributes
     if provenance is not None:
@@ -1000,7 +1016,8 @@ def create_da_obs(filename, state_variable=20, survey=1, provenance=None,
 
     # Create the file
     _nc = ncgen(filename, dims=dims, vars=vars, attr=attr, clobber=clobber,
-                title=title, format="NETCDF3_64BIT")
+                title=title,
+                format="NETCDF4" if compress else "NETCDF3_64BIT")
 
     # Return the new file
     return _nc
@@ -131,6 +131,32 @@ def _provenance_from_string(s):
         return int(s)
 
 
+def _update_provenance(nc):
+    """
+    PRIVATE method: Update the provenance definitions from those given in
+    the attributes of an observation file (or the attribute itself), and
+    return the provenances that are defined.
+    """
+    try:
+        attr = nc if isinstance(nc, str) else nc.obs_provenance
+        provs = dict((int(k.strip()), v.strip())
+                     for v, k in
+                     (it.split(':') for it in attr.split(',')))
+    except (AttributeError, ValueError):
+        return []
+    obs_provenance.update(provs)
+    return list(provs)
+
+
+def _provenance_attr(provenance):
+    """
+    PRIVATE method: Describe the given provenances for the attributes of
+    an observation file
+    """
+    return ','.join((':'.join((obs_provenance.get(v, "UNKNOWN"), str(v)))
+                     for v in np.unique(provenance)))
+
+
 def asobs(obs):
     """
     Return the input as an observation array if possible. If the parameter
@@ -195,8 +221,191 @@ def asprovenance(prov):
         return prov
 
 
+# Define the variables of an observation file for each column
+_obs_variables = {"time": "obs_time", "x": "obs_Xgrid", "y": "obs_Ygrid",
+                  "z": "obs_Zgrid", "lat": "obs_lat", "lon": "obs_lon",
+                  "depth": "obs_depth", "value": "obs_value",
+                  "error": "obs_error", "type": "obs_type",
+                  "provenance": "obs_provenance", "meta": "obs_meta"}
+
+# Define the columns of the observation structure and how they are stored
+_obs_columns = {"time": np.float64, "x": np.float64, "y": np.float64,
+                "z": np.float64, "lat": np.float64, "lon": np.float64,
+                "depth": np.float64, "value": np.float64,
+                "error": np.float64, "type": np.int32,
+                "provenance": np.int32, "meta": np.float64}
+
+
+class _column:
+    """
+    PRIVATE class: descriptor to access a column of the observation
+    storage. All of the columns share a single length and a capacity that
+    grows geometrically, so that adding observations does not copy the
+    existing values every time. Until the structure is made consistent,
+    the columns hold whatever was assigned to them.
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        try:
+            col = obj._cols[self.name]
+        except KeyError:
+            raise AttributeError(self.name) from None
+        return col if obj._n is None else col[:obj._n]
+
+    def __set__(self, obj, value):
+        if obj._n is not None and np.ndim(value) == 1 and \
+                np.size(value) == obj._n:
+            if self.name == "type":
+                value = astype(value)
+            elif self.name == "provenance":
+                value = asprovenance(value)
+            else:
+                # Masked values are filled as the storage is packed so
+                # that they are removed when made consistent
+                fill = np.nan if np.issubdtype(_obs_columns[self.name],
+                                               np.floating) else 0
+                value = np.ma.filled(value, fill)
+            col = obj._cols[self.name]
+            if obj._shared:
+                # Replacing a column shared with a view gives it its own
+                # copy, so that the other structure is not changed
+                col = np.empty(col.size, dtype=col.dtype)
+                obj._cols[self.name] = col
+            col[:obj._n] = value
+        else:
+            obj._unpack()
+            obj._cols[self.name] = np.asanyarray(value)
+        if self.name in ("time", "lon", "lat") and \
+                getattr(obj, "_index", None) is not None:
+            obj._index.order = None
+
+
+def _index_filename(filename):
+    """
+    PRIVATE method: name of the index file saved alongside an obs file
+    """
+    import os
+    return os.path.splitext(filename)[0] + "_index.npz"
+
+
+class _obs_index:
+    """
+    PRIVATE class: spatio-temporal index of an observation structure. The
+    observations are ordered in time and grouped into bins of width dt; a
+    tree of the lon/lat positions is built for each bin the first time it
+    is searched. Adding or removing observations updates the order and
+    discards only the trees of the bins that changed; added observations
+    are queued and merged into the order together when the index is next
+    used. The index follows whole-column assignment but not changes to
+    elements of the time, lon, or lat columns in place.
+    """
+
+    def __init__(self, time, dt, order=None):
+        self.dt = dt
+        if order is None:
+            order = np.argsort(time, kind='mergesort')
+        self.order = order
+        self.time = time[order]
+        self._trees = {}
+        self._pending = []
+        self._bin()
+
+    def _bin(self):
+        bins = np.floor(self.time / self.dt)
+        self.start = np.flatnonzero(np.r_[True, np.diff(bins) > 0]) \
+            if bins.size else np.zeros(0, dtype=int)
+        self.stop = np.r_[self.start[1:], bins.size].astype(int)
+        self.bins = bins[self.start]
+
+    def _drop(self, times):
+        for b in np.unique(np.floor(times / self.dt)):
+            self._trees.pop(b, None)
+
+    def append(self, time, offset):
+        """
+        Queue the given times for the observations that begin at offset
+        """
+        if self.order is None:
+            return
+        time = np.array(time)
+        self._pending.append((time, offset))
+        self._drop(time)
+
+    def merge(self):
+        """
+        Insert the queued observations into the order
+        """
+        if not self._pending:
+            return
+        time = np.hstack([t for t, _ in self._pending])
+        index = np.hstack([np.arange(o, o + t.size)
+                           for t, o in self._pending])
+        self._pending = []
+        order = np.argsort(time, kind='mergesort')
+        time = time[order]
+        pos = np.searchsorted(self.time, time, side='right')
+        self.order = np.insert(self.order, pos, index[order])
+        self.time = np.insert(self.time, pos, time)
+        self._bin()
+
+    def remove(self, keep):
+        """
+        Remove the observations that are not kept and renumber the rest
+        """
+        if self.order is None:
+            return
+        self.merge()
+        kept = keep[self.order]
+        self._drop(self.time[~kept])
+        self.order = (np.cumsum(keep) - 1)[self.order[kept]]
+        self.time = self.time[kept]
+        self._bin()
+
+    def window(self, start=None, end=None):
+        """
+        Return the range of sorted positions and the range of bins that
+        cover the given time period
+        """
+        lo = 0 if start is None else \
+            np.searchsorted(self.time, start, side='left')
+        hi = self.time.size if end is None else \
+            np.searchsorted(self.time, end, side='right')
+        b0 = np.searchsorted(self.start, lo, side='right') - 1
+        b1 = np.searchsorted(self.start, hi, side='left')
+        return lo, hi, max(b0, 0), b1
+
+    def tree(self, n, lon, lat):
+        """
+        Return the lon/lat tree of the given bin, building it if needed
+        """
+        from scipy.spatial import cKDTree
+        b = self.bins[n]
+        if b not in self._trees:
+            l = self.order[self.start[n]:self.stop[n]]
+            self._trees[b] = cKDTree(np.column_stack((lon[l], lat[l])))
+        return self._trees[b]
+
+
 class obs:
 
+    time = _column("time")
+    x = _column("x")
+    y = _column("y")
+    z = _column("z")
+    lat = _column("lat")
+    lon = _column("lon")
+    depth = _column("depth")
+    value = _column("value")
+    error = _column("error")
+    type = _column("type")
+    provenance = _column("provenance")
+    meta = _column("meta")
+
     def __init__(self, filename=None, time=None, x=None, y=None, z=None,
                  lat=None, lon=None, depth=None, value=None, error=None,
                  type=None, provenance=None, meta=None,
@@ -234,6 +443,10 @@ class obs:
           obs additional information
         """
         self.title = title
+        self._cols = {}
+        self._n = None
+        self._shared = False
+        self._index = None
         if filename is not None:
             nc = seapy.netcdf(filename)
             # Construct an array from the data in the file. If obs_meta
@@ -250,20 +463,14 @@ class obs:
             self.error = nc.variables["obs_error"][:]
             self.type = nc.variables["obs_type"][:]
             self.provenance = nc.variables["obs_provenance"][:]
-            # Update the provenance definitions
-            try:
-                obs_provenance.update(dict((int(k.strip()), v.strip())
-                                           for v, k in
-                                           (it.split(':') for it in
-                                            nc.obs_provenance.split(','))))
-            except (AttributeError, ValueError):
-                pass
+            _update_provenance(nc)
             try:
                 self.meta = nc.variables["obs_meta"][:]
             except KeyError:
                 self.meta = np.zeros(self.value.size)
             finally:
                 nc.close()
+            self._consistent()
         else:
             self.filename = None
             if time is not None:
@@ -294,40 +501,77 @@ class obs:
                 self.meta = np.atleast_1d(meta)
             self._consistent()
 
+    def _unpack(self):
+        """
+        PRIVATE method: release the columns from the shared storage so that
+        they may be replaced with arrays of any size.
+        """
+        if self._n is not None:
+            self._cols = {k: v[:self._n] for k, v in self._cols.items()}
+            self._n = None
+
+    def _pack(self, cols):
+        """
+        PRIVATE method: copy the given dictionary of equal-length columns
+        into the shared storage.
+        """
+        n = len(cols["time"])
+        self._cols = {}
+        self._shared = False
+        for k, dtype in _obs_columns.items():
+            fill = np.nan if np.issubdtype(dtype, np.floating) else 0
+            self._cols[k] = np.empty(n, dtype=dtype)
+            self._cols[k][:] = np.ma.filled(cols[k], fill)
+        self._n = n
+
+    def _reserve(self, size):
+        """
+        PRIVATE method: ensure the storage can hold the given number of
+        observations, growing it geometrically if not.
+        """
+        capacity = self._cols["time"].size
+        if capacity >= size:
+            return
+        capacity = max(size, 2 * capacity)
+        for k, v in self._cols.items():
+            col = np.empty(capacity, dtype=v.dtype)
+            col[:self._n] = v[:self._n]
+            self._cols[k] = col
+        self._shared = False
+
     def _consistent(self):
         """
         PRIVATE method: try to make the structure self-consistent. Throw
         an exception if not possible.
         """
-        # Make sure required arrays are a 1d array
-        self.time = self.time.ravel()
-        self.x = self.x.ravel()
-        self.y = self.y.ravel()
-        self.value = self.value.ravel()
-        self.error = self.error.ravel()
-        self.type = astype(self.type.ravel())
-
-        lt = self.time.size
-        if not lt == self.x.size == self.y.size == \
-                self.value.size == self.error.size == self.type.size:
-            # If these lengths are not equal, then there is a serious issue
-            raise ValueError(
-                "Lengths of observation attributes are not equal.")
-        else:
-            # For the others, we can pad the information to ensure
-            # consistency
-            def _resizearr(key, n):
-                arr = getattr(self, key, np.zeros(n))
-                if arr.size == n:
-                    return arr
-                return np.resize(arr, n)
-
-            self.z = _resizearr('z', lt)
-            self.lat = _resizearr('lat', lt)
-            self.lon = _resizearr('lon', lt)
-            self.depth = _resizearr('depth', lt)
-            self.provenance = asprovenance(_resizearr('provenance', lt))
-            self.meta = _resizearr('meta', lt)
+        if self._n is None:
+            # Make sure required arrays are a 1d array
+            cols = {k: getattr(self, k).ravel() for k in
+                    ("time", "x", "y", "value", "error")}
+            cols["type"] = astype(self.type.ravel())
+
+            lt = cols["time"].size
+            if not lt == cols["x"].size == cols["y"].size == \
+                    cols["value"].size == cols["error"].size == \
+                    cols["type"].size:
+                # If these lengths are not equal, then there is a serious
+                # issue
+                raise ValueError(
+                    "Lengths of observation attributes are not equal.")
+            else:
+                # For the others, we can pad the information to ensure
+                # consistency
+                def _resizearr(key, n):
+                    arr = np.ravel(getattr(self, key, np.zeros(n)))
+                    if arr.size == n:
+                        return arr
+                    return np.resize(arr, n)
+
+                for k in ("z", "lat", "lon", "depth", "meta"):
+                    cols[k] = _resizearr(k, lt)
+                cols["provenance"] = asprovenance(
+                    _resizearr('provenance', lt))
+            self._pack(cols)
 
         # Eliminate bad values
         good_vals = np.logical_and.reduce((
@@ -350,11 +594,34 @@ class obs:
         return self.value.size
 
     def __getitem__(self, l):
-        return obs(time=self.time[l], x=self.x[l], y=self.y[l],
-                   z=self.z[l], lon=self.lon[l], lat=self.lat[l],
-                   depth=self.depth[l], value=self.value[l],
-                   error=self.error[l], type=self.type[l],
-                   provenance=self.provenance[l], meta=self.meta[l])
+        """
+        Select a subset of the observations. As with numpy, slices return
+        a view that shares memory with this structure: changing elements in
+        one (e.g., sub.value[:] = 0) changes them in the other. Assigning a
+        whole attribute (e.g., sub.error = err), or adding or deleting
+        observations, gives it its own copy. Integers, boolean masks, and
+        index arrays always return a copy.
+        """
+        if self._n is None:
+            self._consistent()
+        if isinstance(l, tuple) and len(l) == 1:
+            l = l[0]
+        if np.ndim(l) == 0 and not isinstance(l, slice):
+            l = np.array([int(l)])
+        elif not isinstance(l, slice):
+            l = np.asarray(l)
+        new = obs.__new__(obs)
+        new.title = self.title
+        new.filename = None
+        new._cols = {k: v[:self._n][l] for k, v in self._cols.items()}
+        new._n = new._cols["time"].size
+        new.shape = (new._n,)
+        new._index = None
+        if isinstance(l, slice):
+            new._shared = self._shared = True
+        else:
+            new._shared = False
+        return new
 
     def __setitem__(self, l, new_obs):
         if not isinstance(new_obs, seapy.roms.obs.obs):
@@ -372,6 +639,8 @@ class obs:
         self.type[l] = new_obs.type
         self.provenance[l] = new_obs.provenance
         self.meta[l] = new_obs.meta
+        if self._index is not None:
+            self._index.order = None
         self._consistent()
 
     def __repr__(self):
@@ -410,32 +679,42 @@ class obs:
         >>> a.add(b)
 
         """
-        self._consistent()
+        # Only check structures that are not already in the storage so that
+        # adding repeatedly does not re-examine the existing observations
+        if self._n is None:
+            self._consistent()
         new_obs._consistent()
-        self.time = np.append(self.time, new_obs.time)
-        self.x = np.append(self.x, new_obs.x)
-        self.y = np.append(self.y, new_obs.y)
-        self.z = np.append(self.z, new_obs.z)
-        self.lat = np.append(self.lat, new_obs.lat)
-        self.lon = np.append(self.lon, new_obs.lon)
-        self.depth = np.append(self.depth, new_obs.depth)
-        self.value = np.append(self.value, new_obs.value)
-        self.error = np.append(self.error, new_obs.error)
-        self.type = np.append(self.type, new_obs.type)
-        self.provenance = np.append(self.provenance, new_obs.provenance)
-        self.meta = np.append(self.meta, new_obs.meta)
+        n = self._n
+        self._reserve(n + new_obs._n)
+        for k, v in self._cols.items():
+            v[n:n + new_obs._n] = new_obs._cols[k][:new_obs._n]
+        self._n = n + new_obs._n
+        if self._index is not None:
+            self._index.append(new_obs.time, n)
 
     def copy(self):
         """
-        deep copy this class and return the new copy.
+        copy this class and return the new copy. The observation columns
+        are copied (without any spare storage); other attributes are
+        shared until they are replaced.
 
         Returns
         -------
         obs : obs,
-            deep copy of the class
+            copy of the class
         """
         import copy
-        return copy.deepcopy(self)
+        new = copy.copy(self)
+        if self._n is None:
+            new._cols = {k: v.copy() for k, v in self._cols.items()}
+        else:
+            new._cols = {k: v[:self._n].copy() for k, v in self._cols.items()}
+        new._shared = False
+        if self._index is not None:
+            new._index = copy.copy(self._index)
+            new._index._trees = dict(self._index._trees)
+            new._index._pending = list(self._index._pending)
+        return new
 
     def delete(self, obj):
         """
@@ -448,53 +727,380 @@ class obs:
 
         Returns
         -------
-        Nothing: updates the class arrays
+        Nothing: updates the class arrays in place
 
         Examples
         --------
         Delete every other observation
         >>> myobs.delete(np.s_[::2])
         """
-        self.time = np.delete(self.time, obj)
-        self.x = np.delete(self.x, obj)
-        self.y = np.delete(self.y, obj)
-        self.z = np.delete(self.z, obj)
-        self.lat = np.delete(self.lat, obj)
-        self.lon = np.delete(self.lon, obj)
-        self.depth = np.delete(self.depth, obj)
-        self.value = np.delete(self.value, obj)
-        self.error = np.delete(self.error, obj)
-        self.type = np.delete(self.type, obj)
-        self.provenance = np.delete(self.provenance, obj)
-        self.meta = np.delete(self.meta, obj)
+        if self._n is None:
+            self._consistent()
+        keep = np.ones(self._n, dtype=bool)
+        keep[obj] = False
+        n = np.count_nonzero(keep)
+        if self._shared:
+            # The storage is shared with a view, so make our own
+            self._cols = {k: v[:self._n][keep] for k, v in self._cols.items()}
+            self._shared = False
+        else:
+            for v in self._cols.values():
+                v[:n] = v[:self._n][keep]
+        self._n = n
+        if self._index is not None:
+            self._index.remove(keep)
+
+    def remove_duplicates(self, dt=1 / 1440, dx=1e-4, dz=0.1,
+                          policy="error"):
+        """
+        Find the observations of the same type that are duplicates of each
+        other (e.g., the same profile from two sources), and resolve them.
+        The times, positions, and depths are rounded to the tolerances,
+        and observations of the same type with the same rounded keys are
+        duplicates, found with a single sort rather than by comparing every
+        pair. Each key covers a half-open interval of the tolerance, so all
+        of the observations in a group are strictly within the tolerances
+        of each other; duplicates that fall on either side of an interval
+        edge are not found.
+
+        Parameters
+        ----------
+        dt : float, optional
+            tolerance in time [days]
+        dx : float, optional
+            tolerance in longitude and latitude [deg]
+        dz : float, optional
+            tolerance in depth [m]
+        policy : string, optional
+            how to resolve a group of duplicates:
+              "error" : keep the observation with the smallest error
+              "newest" : keep the observation that was added last
+              "average" : replace them with their mean, taking the type,
+                          provenance, and meta of the first
+
+        Returns
+        -------
+        count : int,
+            number of observations removed
+
+        Examples
+        --------
+        Combine two feeds of the same data, keeping the best of each
+
+        >>> a.add(b)
+        >>> a.remove_duplicates(policy="error")
+        """
+        if policy not in ("error", "newest", "average"):
+            raise ValueError("Unknown policy: {:s}".format(str(policy)))
+        if self._n is None:
+            self._consistent()
+        n = self._n
+        if not n:
+            return 0
+
+        # Round each value to the half-open interval of its tolerance
+        def _key(v, tol):
+            return np.floor(v / tol + 0.5).astype(np.int64)
+
+        keys = [self.type.astype(np.int64),
+                _key(self.time - np.min(self.time), dt),
+                _key(self.lat, dx), _key(self.lon, dx),
+                _key(self.depth, dz)]
+
+        # Sort so that the observation to keep is first in its group
+        if policy == "error":
+            tie = self.error
+        elif policy == "newest":
+            tie = -np.arange(n)
+        else:
+            tie = np.arange(n)
+        order = np.lexsort([tie] + keys[::-1])
+        first = np.r_[True, np.any([np.diff(k[order]) != 0 for k in keys],
+                                   axis=0)]
+        del keys
+        if np.all(first):
+            return 0
+
+        if policy == "average":
+            if self._shared:
+                # Do not change the observations of a view we share with
+                self._cols = {k: v[:n].copy() for k, v in self._cols.items()}
+                self._shared = False
+            start = np.flatnonzero(first)
+            count = np.diff(np.r_[start, n])
+            keep = order[start]
+            for k in ("time", "x", "y", "z", "lat", "lon", "depth",
+                      "value", "error"):
+                col = getattr(self, k)
+                col[keep] = np.add.reduceat(col[order], start) / count
+        self.delete(order[~first])
+        return n - self._n
 
     def create_survey(self, dt=0):
         """
-        Build the survey structure from the observations
+        Build the survey structure from the observations. Observations are
+        sorted in time, and each survey collects the observations that are
+        within dt of the first observation in the survey (and gives them
+        its time), so that surveys are separated by at least dt.
+
+        Parameters
+        ----------
+        dt : float, optional
+            minimum separation in time between surveys
+
+        Returns
+        -------
+        None : sets the sort, survey_time, and nobs attributes
         """
         # Generate the sort list
         self.sort = np.argsort(self.time, kind='mergesort')
+        times = self.time[self.sort]
 
-        # Build the survey structure
-        times, counts = np.unique(self.time[self.sort], return_counts=True)
+        # A new survey begins at each change in time
+        start = np.ones(times.size, dtype=bool)
+        start[1:] = np.diff(times) > 0
 
-        # Make sure everything is within dt
+        # Make sure everything is within dt. For each time, find the first
+        # time that is at least dt later; a survey begins there, so only
+        # the survey starts are stepped through.
         if dt:
-            delta = np.diff(times)
-            while np.any(delta < dt):
-                idx = np.argmin(delta)
-                self.time[self.time == times[idx + 1]] = times[idx]
-                times[idx + 1] = times[idx]
-                times = np.unique(times)
-                delta = np.diff(times)
+            first = np.flatnonzero(start)
+            nxt = np.searchsorted(times[first], times[first] + dt)
+            keep = np.zeros(first.size, dtype=bool)
+            n = 0
+            while n < first.size:
+                keep[n] = True
+                n = nxt[n]
+            start[first[~keep]] = False
+
+        # Build the survey structure
+        first = np.flatnonzero(start)
+        self.survey_time = times[first]
+        self.nobs = np.diff(np.append(first, times.size))
+        if dt:
+            # Assign the times as a whole so that a view does not change
+            # the structure that it shares storage with
+            time = self.time.copy()
+            time[self.sort] = np.repeat(self.survey_time, self.nobs)
+            self.time = time
+
+    def build_index(self, dt=1, filename=None):
+        """
+        Build a spatio-temporal index of the observations to speed up
+        repeated searches with query and nearest. The observations are
+        ordered in time and grouped into bins of dt, and each bin is
+        searched with a tree of the lon/lat positions. The index is kept
+        up to date as observations are added or deleted, or as the time,
+        lon, or lat are assigned as a whole (e.g., o.time = t). Changing
+        their elements in place (e.g., o.time[l] += 1) leaves the index
+        stale; call build_index again afterwards.
+
+        Parameters
+        ----------
+        dt : float, optional
+            width of the time bins [days]
+        filename : string, optional
+            load the index from a file written by save_index rather than
+            building it. If not given and the observations were loaded from
+            a file, an up-to-date index saved alongside it is used.
+
+        Returns
+        -------
+        None
+
+        Examples
+        --------
+        >>> a=obs("test.nc")
+        >>> a.build_index(dt=1)
+        >>> l=a.query(start=100, end=103, lon=(200, 210), lat=(15, 25))
+        """
+        import os
+
+        if self._n is None:
+            self._consistent()
+        self._index = None
+        fname = filename
+        if fname is None and isinstance(self.filename, str):
+            fname = _index_filename(self.filename)
+        if fname is not None and os.path.exists(fname):
+            with np.load(fname) as data:
+                order = data["order"]
+                if order.size == self._n and \
+                        np.array_equal(data["time"], self.time[order]):
+                    self._index = _obs_index(self.time, data["dt"][()],
+                                             order)
+                    return
+        if filename is not None:
+            warn("{:s} does not match the observations; rebuilding "
+                 "the index".format(filename))
+        self._index = _obs_index(self.time, dt)
 
-            # Re-sort the surveys
-            times, counts = np.unique(self.time[self.sort], return_counts=True)
+    def _get_index(self):
+        """
+        PRIVATE method: return the index, building or refreshing it
+        as needed.
+        """
+        if self._n is None:
+            self._consistent()
+        if self._index is None:
+            self.build_index()
+        elif self._index.order is None:
+            self._index = _obs_index(self.time, self._index.dt)
+        else:
+            self._index.merge()
+        return self._index
+
+    def save_index(self, filename=None):
+        """
+        Save the spatio-temporal index to a file so that it can be loaded
+        by build_index rather than rebuilt.
+
+        Parameters
+        ----------
+        filename : string, optional
+            name of file to save. If the obs were loaded from a file and
+            filename is not specified, the index is saved alongside it.
 
-        self.survey_time = times
-        self.nobs = counts
+        Returns
+        -------
+        None
+        """
+        if filename is None and isinstance(self.filename, str):
+            filename = _index_filename(self.filename)
+        if filename is None:
+            raise ValueError("No filename given")
+        idx = self._get_index()
+        with open(filename, "wb") as f:
+            np.savez(f, dt=idx.dt, order=idx.order, time=idx.time)
 
-    def to_netcdf(self, filename=None, dt=0, clobber=True):
+    def query(self, start=None, end=None, lon=None, lat=None, depth=None):
+        """
+        Find the observations within the given time period, region, and
+        depth range. If no index has been built, one is built with the
+        default time bins.
+
+        Parameters
+        ----------
+        start : float, optional
+            earliest time of observations [days]
+        end : float, optional
+            latest time of observations [days]
+        lon : tuple, optional
+            (min, max) longitude of observations [deg]
+        lat : tuple, optional
+            (min, max) latitude of observations [deg]
+        depth : tuple, optional
+            (min, max) depth of observations [m]
+
+        Returns
+        -------
+        index : ndarray,
+            sorted indices of the observations that match
+
+        Examples
+        --------
+        Find the temperature innovations in a box for a week
+
+        >>> l=a.query(start=100, end=107, lon=(200, 210), lat=(15, 25))
+        >>> week=a[l]
+        """
+        idx = self._get_index()
+        lo, hi, b0, b1 = idx.window(start, end)
+        if lon is None and lat is None:
+            pos = np.arange(lo, hi)
+        else:
+            box = np.array([(-np.inf, np.inf) if lon is None else lon,
+                            (-np.inf, np.inf) if lat is None else lat],
+                           dtype=float)
+            pos = []
+            for n in range(b0, b1):
+                tree = idx.tree(n, self.lon, self.lat)
+                bmin = np.maximum(box[:, 0], tree.mins)
+                bmax = np.minimum(box[:, 1], tree.maxes)
+                if np.any(bmin > bmax):
+                    continue
+                # Search the square around the box, padded for round-off
+                tol = 1e-9 * (1 + np.max(np.abs((bmin, bmax))))
+                p = tree.query_ball_point((bmin + bmax) / 2,
+                                          np.max(bmax - bmin) / 2 + tol,
+                                          p=np.inf)
+                pos.append(idx.start[n] + np.asarray(p, dtype=int))
+            pos = np.concatenate(pos) if pos else np.zeros(0, dtype=int)
+            pos = pos[(pos >= lo) & (pos < hi)]
+        l = idx.order[pos]
+
+        # Apply the exact limits to the candidates
+        keep = np.ones(l.size, dtype=bool)
+        for col, lim in ((self.lon, lon), (self.lat, lat),
+                         (self.depth, depth)):
+            if lim is not None:
+                v = col[l]
+                keep &= (v >= lim[0]) & (v <= lim[1])
+        return np.sort(l[keep])
+
+    def nearest(self, lon, lat, start=None, end=None, k=1):
+        """
+        Find the observations nearest to the given positions within the
+        given time period. Distances are measured in degrees of lon/lat.
+        If no index has been built, one is built with the default time
+        bins.
+
+        Parameters
+        ----------
+        lon : float or ndarray,
+            longitude of positions [deg]
+        lat : float or ndarray,
+            latitude of positions [deg]
+        start : float, optional
+            earliest time of observations [days]
+        end : float, optional
+            latest time of observations [days]
+        k : int, optional
+            number of nearest observations to find
+
+        Returns
+        -------
+        dist : ndarray,
+            distance to the nearest observations [deg]; inf where fewer
+            than k observations are found
+        index : ndarray,
+            indices of the nearest observations; len(obs) where fewer than
+            k observations are found
+        """
+        from scipy.spatial import cKDTree
+
+        idx = self._get_index()
+        lo, hi, b0, b1 = idx.window(start, end)
+        pts = np.column_stack((np.ravel(lon), np.ravel(lat)))
+        dist = np.full((pts.shape[0], k), np.inf)
+        pos = np.full((pts.shape[0], k), -1)
+        for n in range(b0, b1):
+            s0, s1 = max(idx.start[n], lo), min(idx.stop[n], hi)
+            if s0 >= s1:
+                continue
+            if s0 == idx.start[n] and s1 == idx.stop[n]:
+                tree = idx.tree(n, self.lon, self.lat)
+            else:
+                # Only part of the bin is in the period
+                l = idx.order[s0:s1]
+                tree = cKDTree(np.column_stack((self.lon[l], self.lat[l])))
+            d, p = tree.query(pts, k=k)
+            d, p = d.reshape(-1, k), p.reshape(-1, k)
+            p = np.where(p < tree.n, s0 + p, -1)
+            d = np.hstack((dist, d))
+            p = np.hstack((pos, p))
+            best = np.argsort(d, axis=1, kind='stable')[:, :k]
+            dist = np.take_along_axis(d, best, axis=1)
+            pos = np.take_along_axis(p, best, axis=1)
+        index = np.where(pos < 0, self._n, idx.order[pos])
+        if k == 1:
+            dist, index = dist[:, 0], index[:, 0]
+        if np.ndim(lon) == 0:
+            dist, index = dist[0], index[0]
+        return dist, index
+
+    def to_netcdf(self, filename=None, dt=0, clobber=True, append=False,
+                  compress=False):
         """
         Write out the observations into the specified netcdf file
 
@@ -508,6 +1114,22 @@ class obs:
             make as part of same survey
         clobber : bool, optional
             if True, any existing file is overwritten
+        append : bool, optional
+            if True and the file exists, add the observations to it as new
+            surveys. Files written with compress are extended in place when
+            the observations follow those in the file; otherwise, the file
+            is rewritten with all of the observations.
+        compress : bool, optional
+            if True, write a NETCDF4 file with compressed, chunked
+            observations and an unlimited survey dimension that can be
+            appended to in place
+
+        Examples
+        --------
+        Start a compressed file and add each day to it
+
+        >>> day1.to_netcdf("obs.nc", compress=True)
+        >>> day2.to_netcdf("obs.nc", append=True)
         """
         import os
 
@@ -515,7 +1137,7 @@ class obs:
         if filename is None and self.filename is not None:
             filename = self.filename
         if filename is None:
-            error("No filename given")
+            raise ValueError("No filename given")
 
         # Save out the observations by survey
         self._consistent()
@@ -525,6 +1147,9 @@ class obs:
                 "No observations are available to be written to {:s}".format(filename))
             return None
 
+        if append and os.path.exists(filename):
+            return self._append_netcdf(filename, dt)
+
         if not clobber and os.path.exists(filename):
             warn("{:s} exists with no clobber.".format(filename))
             return None
@@ -533,31 +1158,443 @@ class obs:
         nc = seapy.roms.ncgen.create_da_obs(filename,
                                             survey=self.survey_time.size,
                                             state_variable=state_vars,
-                                            provenance=','.join((':'.join(
-                                                (obs_provenance.get(v, "UNKNOWN"), str(v)))
-                                                for v in np.unique(self.provenance))),
-                                            clobber=True, title=self.title)
+                                            provenance=_provenance_attr(
+                                                self.provenance),
+                                            clobber=True, title=self.title,
+                                            compress=compress)
         nc.variables["spherical"][:] = 1
-        nc.variables["Nobs"][:] = self.nobs
-        nc.variables["survey_time"][:] = self.survey_time
         nc.variables["obs_variance"][:] = np.ones(state_vars) * 0.1
-        nc.variables["obs_time"][:] = self.time[self.sort]
-        nc.variables["obs_Xgrid"][:] = self.x[self.sort]
-        nc.variables["obs_Ygrid"][:] = self.y[self.sort]
-        nc.variables["obs_Zgrid"][:] = self.z[self.sort]
-        nc.variables["obs_lat"][:] = self.lat[self.sort]
-        nc.variables["obs_lon"][:] = self.lon[self.sort]
-        nc.variables["obs_depth"][:] = self.depth[self.sort]
-        nc.variables["obs_value"][:] = self.value[self.sort]
-        nc.variables["obs_error"][:] = self.error[self.sort]
-        nc.variables["obs_type"][:] = self.type[self.sort]
-        nc.variables["obs_provenance"][:] = self.provenance[self.sort]
-        nc.variables["obs_meta"][:] = self.meta[self.sort]
+        self._write_surveys(nc)
+        nc.close()
+
+    def _append_netcdf(self, filename, dt):
+        """
+        PRIVATE method: append the surveys to an existing file, extending
+        its unlimited dimensions if they follow the surveys in the file;
+        otherwise, rewrite the file with all of the observations.
+        """
+        nc = netCDF4.Dataset(filename, "a")
+        provs = _update_provenance(nc)
+        survey = nc.dimensions["survey"]
+        last = nc.variables["survey_time"][-1] if len(survey) else -np.inf
+        extend = survey.isunlimited() and \
+            np.max(self.type) <= len(nc.dimensions["state_variable"]) and \
+            (self.survey_time[0] >= last + dt if dt else
+             self.survey_time[0] > last)
+        if extend:
+            nc.obs_provenance = _provenance_attr(
+                np.append(provs, self.provenance))
+            self._write_surveys(nc, len(survey), len(nc.dimensions["datum"]))
+            nc.close()
+            return None
+
+        # The surveys would be out of order, so rewrite the file
+        compress = survey.isunlimited()
+        title = getattr(nc, "title", self.title)
         nc.close()
+        new = obs(filename)
+        new.add(self)
+        new.title = title
+        new.to_netcdf(filename, dt=dt, clobber=True, compress=compress)
+
+    def _write_surveys(self, nc, s0=0, n0=0):
+        """
+        PRIVATE method: write the surveys into the file beginning at the
+        given survey and datum
+        """
+        ns = s0 + self.survey_time.size
+        n = n0 + self.sort.size
+        nc.variables["Nobs"][s0:ns] = self.nobs
+        nc.variables["survey_time"][s0:ns] = self.survey_time
+        for k, v in _obs_variables.items():
+            nc.variables[v][n0:n] = getattr(self, k)[self.sort]
+
+    def to_arrow(self):
+        """
+        Convert the observations into an Arrow table (requires pyarrow).
+        The columns of the table share the memory of the observations, so
+        the table should not be kept while the observations are changed.
+        The title and provenance definitions are kept in the metadata of
+        the table.
+
+        Returns
+        -------
+        table : pyarrow.Table
+        """
+        import pyarrow as pa
+
+        if self._n is None:
+            self._consistent()
+        return pa.table({k: getattr(self, k) for k in _obs_columns},
+                        metadata={"title": self.title,
+                                  "obs_provenance":
+                                  _provenance_attr(self.provenance)})
+
+    def to_parquet(self, path, dt=None):
+        """
+        Write out the observations into a parquet file (requires pyarrow),
+        ordered in time so that readers can skip the row groups outside
+        of a time period.
+
+        Parameters
+        ----------
+        path : string
+            name of the file to save. If dt is given, this is the directory
+            of the dataset.
+        dt : float, optional
+            if given, partition the observations into directories by time
+            in bins of dt (e.g., "time_bin=3650"). Partitions that are
+            written again are replaced, so an archive can be updated one
+            partition at a time.
+
+        Examples
+        --------
+        Save a year of observations in daily partitions
+
+        >>> o.to_parquet("obs_archive", dt=1)
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        import pyarrow.dataset as ds
+
+        table = self.to_arrow()
+        table = table.take(np.argsort(self.time, kind='mergesort'))
+        if dt is None:
+            pq.write_table(table, path)
+            return
+        time_bin = pa.array(np.floor(table.column("time").to_numpy() / dt)
+                            .astype(np.int64))
+        table = table.append_column("time_bin", time_bin)
+        table = table.replace_schema_metadata(dict(
+            table.schema.metadata, partition_dt=str(dt)))
+        ds.write_dataset(table, path, format="parquet",
+                         partitioning=ds.partitioning(
+                             pa.schema([("time_bin", pa.int64())]),
+                             flavor="hive"),
+                         existing_data_behavior="delete_matching")
+
+
+def _datum_range(nc, start, end):
+    """
+    PRIVATE method: use the surveys of an open observation file to find the
+    range of records that cover the time period. If the surveys are not
+    ordered, all of the records are used.
+
+    Returns
+    -------
+    range : slice or None,
+        records of the file to read (None if there are none)
+    """
+    ndatum = len(nc.dimensions["datum"])
+    survey_time = np.ma.filled(nc.variables["survey_time"][:], np.nan)
+    nobs = np.ma.filled(nc.variables["Nobs"][:], 0).astype(int)
+    if np.all(np.diff(survey_time) >= 0) and nobs.sum() == ndatum:
+        offset = np.hstack((0, np.cumsum(nobs)))
+        l = np.nonzero(np.logical_and(survey_time >= start,
+                                      survey_time <= end))[0]
+        if not l.size:
+            return None
+        return np.s_[offset[l[0]]:offset[l[-1] + 1]]
+    return np.s_[0:ndatum]
+
+
+def read(filename, start=None, end=None, type=None, provenance=None,
+         limits=None):
+    """
+    Load the observations from a file that lie within the given time period
+    and match the given types, provenances, and grid limits. The survey
+    structure of the file is used to read only the records that cover the
+    time period rather than the entire file.
+
+    Parameters
+    ----------
+    filename : string,
+        Observation file to read
+    start : float, optional
+        Load observations at or after this time (same units as obs_time)
+    end : float, optional
+        Load observations at or before this time (same units as obs_time)
+    type : string, int, or list, optional
+        Only load observations of the given type(s)
+    provenance : string, int, or list, optional
+        Only load observations of the given provenance(s)
+    limits : dict, optional
+        Only load observations that lie within the grid points,
+        {'north':i, 'south':i, 'east':i, 'west':i }
+
+    Returns
+    -------
+    obs : seapy.roms.obs.obs or None
+        The observations found (None if there are none)
+
+    Examples
+    --------
+    Load the SST observations from a four day cycle
+
+    >>> o = seapy.roms.obs.read("obs_2010s.nc", 3650, 3654, type="temp",
+    >>>                         provenance=["SST_OSTIA", "SST_NAVO_MAP"])
+    """
+    start = -np.inf if start is None else start
+    end = np.inf if end is None else end
+
+    with seapy.netcdf(filename) as nc:
+        _update_provenance(nc)
+
+        # Use the surveys to find the range of records that cover the
+        # time period
+        rng = _datum_range(nc, start, end)
+        if rng is None:
+            return None
+
+        # Load the fields needed to choose the records
+        def _load(var, sl):
+            if _obs_variables[var] not in nc.variables:
+                return np.zeros(sl.stop - sl.start)
+            return nc.variables[_obs_variables[var]][sl]
+
+        fld = {"time": _load("time", rng)}
+        keep = np.logical_and(fld["time"] >= start, fld["time"] <= end)
+        if type is not None:
+            fld["type"] = _load("type", rng)
+            keep &= np.in1d(fld["type"], astype(type))
+        if provenance is not None:
+            fld["provenance"] = _load("provenance", rng)
+            keep &= np.in1d(fld["provenance"], asprovenance(provenance))
+        if limits is not None:
+            fld["x"] = _load("x", rng)
+            fld["y"] = _load("y", rng)
+            keep &= np.logical_and.reduce((
+                fld["x"] >= limits['west'], fld["x"] <= limits['east'],
+                fld["y"] >= limits['south'], fld["y"] <= limits['north']))
+        keep = np.ma.filled(keep, False)
+        if not np.any(keep):
+            return None
+
+        # Read the remaining fields in the contiguous runs of the records
+        # that are kept (or the entire range if there are too many)
+        idx = np.flatnonzero(keep)
+        runs = np.flatnonzero(np.diff(idx) > 1)
+        if runs.size < 100:
+            bounds = zip(np.hstack((idx[0], idx[runs + 1])),
+                         np.hstack((idx[runs], idx[-1])) + 1)
+            runs = [np.s_[rng.start + a:rng.start + b] for a, b in bounds]
+            for var in _obs_variables:
+                if var in fld:
+                    fld[var] = fld[var][keep]
+                else:
+                    fld[var] = np.ma.concatenate([_load(var, r)
+                                                  for r in runs])
+        else:
+            for var in _obs_variables:
+                fld[var] = (fld[var] if var in fld else
+                            _load(var, rng))[keep]
+
+    return obs(**fld)
+
+
+def _from_columns(cols, title="ROMS Observations"):
+    """
+    PRIVATE method: create an observation structure that holds a copy of
+    the given dictionary of equal-length columns
+    """
+    new = obs.__new__(obs)
+    new.title = title
+    new.filename = None
+    new._index = None
+    new._pack(cols)
+    new.shape = (new._n,)
+    return new
+
+
+def from_arrow(table):
+    """
+    Create observations from an Arrow table with columns named as the
+    fields of the observations (time, x, y, value, error, and type are
+    required; the others are filled with zeros if missing).
+
+    Parameters
+    ----------
+    table : pyarrow.Table
+        the observations
+
+    Returns
+    -------
+    obs : seapy.roms.obs.obs
+    """
+    meta = table.schema.metadata or {}
+    if b"obs_provenance" in meta:
+        _update_provenance(meta[b"obs_provenance"].decode())
+    title = meta.get(b"title", b"ROMS Observations").decode()
+    cols = {k: table.column(k).to_numpy() if k in table.column_names
+            else np.zeros(table.num_rows) for k in _obs_columns}
+    return _from_columns(cols, title)
+
+
+def from_parquet(path, start=None, end=None, type=None, provenance=None,
+                 limits=None):
+    """
+    Load the observations from a parquet file or partitioned dataset
+    written by obs.to_parquet (requires pyarrow). The filters are given
+    to the reader so that only the partitions and row groups that may
+    match are read.
+
+    Parameters
+    ----------
+    path : string,
+        parquet file or dataset directory to read
+    start : float, optional
+        Load observations at or after this time
+    end : float, optional
+        Load observations at or before this time
+    type : string, int, or list, optional
+        Only load observations of the given type(s)
+    provenance : string, int, or list, optional
+        Only load observations of the given provenance(s)
+    limits : dict, optional
+        Only load observations that lie within the grid points,
+        {'north':i, 'south':i, 'east':i, 'west':i }
+
+    Returns
+    -------
+    obs : seapy.roms.obs.obs or None
+        The observations found (None if there are none)
+
+    Examples
+    --------
+    Load the SST observations from a four day cycle
+
+    >>> o = seapy.roms.obs.from_parquet("obs_archive", 3650, 3654,
+    >>>                                 type="temp")
+    """
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(path, format="parquet", partitioning="hive")
+    meta = dataset.schema.metadata or {}
+    dt = float(meta[b"partition_dt"]) if b"partition_dt" in meta else None
+
+    # Build the filter
+    expr = []
+    if start is not None:
+        expr.append(ds.field("time") >= start)
+        if dt:
+            expr.append(ds.field("time_bin") >= np.floor(start / dt))
+    if end is not None:
+        expr.append(ds.field("time") <= end)
+        if dt:
+            expr.append(ds.field("time_bin") <= np.floor(end / dt))
+    if type is not None:
+        expr.append(ds.field("type").isin(astype(type).tolist()))
+    if provenance is not None:
+        expr.append(ds.field("provenance").isin(
+            asprovenance(provenance).tolist()))
+    if limits is not None:
+        expr += [ds.field("x") >= limits['west'],
+                 ds.field("x") <= limits['east'],
+                 ds.field("y") >= limits['south'],
+                 ds.field("y") <= limits['north']]
+    filt = None
+    for e in expr:
+        filt = e if filt is None else filt & e
+
+    table = dataset.to_table(
+        columns=[k for k in _obs_columns if k in dataset.schema.names],
+        filter=filt)
+    if not table.num_rows:
+        return None
+    return from_arrow(table.replace_schema_metadata(meta))
+
+
+def _read_columns(filename, start, end, type, provenance, limits):
+    """
+    PRIVATE method: read the observations from a file and return their
+    columns
+    """
+    o = read(filename, start, end, type, provenance, limits)
+    return None if o is None else {k: getattr(o, k) for k in _obs_columns}
+
+
+def read_many(files, n_jobs=1, start=None, end=None, type=None,
+              provenance=None, limits=None, title="ROMS Observations"):
+    """
+    Load the observations from many files at once, reading the files
+    concurrently. The storage for all of the observations is sized from
+    the files before they are read, and the observations of each file are
+    placed into it in the order the files are given.
+
+    Parameters
+    ----------
+    files : list of strings,
+        Observation files to read
+    n_jobs : int, optional
+        Number of files to read concurrently
+    start : float, optional
+        Load observations at or after this time (same units as obs_time)
+    end : float, optional
+        Load observations at or before this time (same units as obs_time)
+    type : string, int, or list, optional
+        Only load observations of the given type(s)
+    provenance : string, int, or list, optional
+        Only load observations of the given provenance(s)
+    limits : dict, optional
+        Only load observations that lie within the grid points,
+        {'north':i, 'south':i, 'east':i, 'west':i }
+    title : string, optional
+        Title to assign the observations structure
+
+    Returns
+    -------
+    obs : seapy.roms.obs.obs or None
+        The observations found (None if there are none)
+
+    Examples
+    --------
+    Load a season of daily files using four processes
+
+    >>> import glob
+    >>> o = seapy.roms.obs.read_many(sorted(glob.glob("obs_*.nc")),
+    >>>                              n_jobs=4, start=3650, end=3740)
+    """
+    from joblib import Parallel, delayed
+
+    # Size the storage from the records of the files within the time
+    # period. The provenance definitions are loaded here, as the readers
+    # may not share them with us.
+    files = list(np.atleast_1d(files))
+    size = 0
+    for f in files:
+        with seapy.netcdf(f) as nc:
+            _update_provenance(nc)
+            rng = _datum_range(nc, -np.inf if start is None else start,
+                               np.inf if end is None else end)
+            if rng is not None:
+                size += rng.stop - rng.start
+    new = _from_columns({k: np.empty(0) for k in _obs_columns}, title)
+    new._reserve(size)
+
+    # Read the files and place each into the storage as it arrives
+    cols = Parallel(n_jobs=n_jobs, return_as="generator")(
+        delayed(_read_columns)(f, start, end, type, provenance, limits)
+        for f in files)
+    for c in cols:
+        if c is None:
+            continue
+        n = new._n + c["time"].size
+        for k, v in new._cols.items():
+            v[new._n:n] = c[k]
+        new._n = n
+        del c
+    if not new._n:
+        return None
+
+    # Release the storage that the filters left unused
+    if new._n < size // 2:
+        new._cols = {k: v[:new._n].copy() for k, v in new._cols.items()}
+    new.shape = (new._n,)
+    return new
 
 
 def gridder(grid, time, lon, lat, depth, data, dt, depth_adjust=False,
-            title='ROMS Observations'):
+            title='ROMS Observations', ij=None):
     """
     Construct an observations set from raw observations by placing them
     onto a grid.
@@ -594,7 +1631,7 @@ def gridder(grid, time, lon, lat, depth, data, dt, depth_adjust=False,
              "provenance"  : string (or integer) of the type from
                              seapy.roms.obs.obs_provenance
             "values" : ndarray of actual observed values in units
-                       for type
+                       for type; masked values are ignored
             "error" : ndarray (or None) of individual observational
                       uncertainty (same units of values). If not known,
                       use None
@@ -607,6 +1644,11 @@ def gridder(grid, time, lon, lat, depth, data, dt, depth_adjust=False,
         same time. The units must be the same as the provided time.
     title : string, optional,
         Title to assign the observations structure for output
+    ij : tuple of ndarray, optional,
+        The fractional (j, i) grid indices of each observation as returned
+        by grid.ij, if they are already known (e.g., for the fixed pixels
+        of a gridded product). Only used for surface observations (depth
+        is None).
 
     Returns
     -------
@@ -634,9 +1676,11 @@ def gridder(grid, time, lon, lat, depth, data, dt, depth_adjust=False,
 
     # Make sure the input is of the proper form
     grid = seapy.model.asgrid(grid)
-    time = np.atleast_1d(time)
-    lon = np.atleast_1d(lon)
-    lat = np.atleast_1d(lat)
+    time = np.ravel(time)
+    lon = np.ravel(lon)
+    lat = np.ravel(lat)
+    if isinstance(data, raw_data):
+        data = [data]
 
     # First, before relying on gridding, extract only the data that are
     # encompassed by the grid
@@ -654,13 +1698,17 @@ def gridder(grid, time, lon, lat, depth, data, dt, depth_adjust=False,
     if depth is None:
         # Get the grid locations from the data locations
         subsurface_values = False
-        (j, i) = grid.ij((lon, lat))
+        if ij is None:
+            (j, i) = grid.ij((lon, lat))
+        else:
+            j = np.ma.ravel(ij[0])[region_list]
+            i = np.ma.ravel(ij[1])[region_list]
         depth = grid.n * np.ones(i.size)
-        k = np.ma.array(np.resize(grid.n, i.size))
+        k = np.ma.array(np.full(i.size, grid.n))
     else:
         # Get the grid locations from the data locations
         subsurface_values = True
-        depth = np.atleast_1d(depth)[region_list]
+        depth = np.ravel(depth)[region_list]
         (k, j, i) = grid.ijk((lon, lat, depth), depth_adjust)
 
     # Sub-select only the points that lie on our grid
@@ -669,133 +1717,119 @@ def gridder(grid, time, lon, lat, depth, data, dt, depth_adjust=False,
     j = j[valid_list].compressed()
     k = k[valid_list].compressed()
     depth = depth[valid_list]
+    points = region_list[0][valid_list]
 
     # Make sure the times are consistent and in dt-space
     if time.size == 1:
-        time = np.resize(time, valid_list[0].size)
+        time = np.resize(time, points.size)
     else:
-        time = time[region_list][valid_list]
+        time = time[points]
+
+    # Drop the observations without a valid time
+    time = np.ma.filled(np.ma.asarray(time, dtype=float), np.nan)
+    good = np.isfinite(time)
+    if not np.all(good):
+        i, j, k, depth, points, time = (v[good] for v in
+                                        (i, j, k, depth, points, time))
+        if not points.size:
+            warn("No observations have valid times")
+            return None
     dtime = np.floor(time / dt)
-
-    # Loop over all time intervals putting everything together. NOTE: The
-    # preference is to use aggregate over the time-dimension just as we do
-    # in the spatial-dimension; however, this led to crashing.
-    ot = list()
-    ox = list()
-    oy = list()
-    oz = list()
-    odep = list()
-    olon = list()
-    olat = list()
-    oval = list()
-    oerr = list()
-    oprov = list()
-    otype = list()
-    for t in seapy.progressbar.progress(np.unique(dtime)):
-        time_list = np.where(dtime == t)
-        mtime = np.nanmean(time[time_list])
-
-        for v in data:
-            valid_data = np.s_[:]
-            if isinstance(v.values, np.ma.core.MaskedArray):
-                valid_data = \
-                    (v.values[region_list][valid_list][time_list].nonzero())[0]
-                if not valid_data.size:
-                    continue
-
-            # Put together the indices based on the type of data we have
-            if subsurface_values:
-                idx = (k[time_list][valid_data],
-                       j[time_list][valid_data],
-                       i[time_list][valid_data])
-            else:
-                idx = (j[time_list][valid_data],
-                       i[time_list][valid_data])
-            indices = np.floor(idx).astype(int)
-
-            # Grid the data onto our grid and compute the mean and variance
-            ii = aggregate(indices, i[time_list][valid_data], func='mean')
-            jj = aggregate(indices, j[time_list][valid_data], func='mean')
-            binned = np.where(ii * jj > 0)
-            ii = ii[binned].ravel()
-            jj = jj[binned].ravel()
-            (latl, lonl) = grid.latlon((ii, jj))
-            Nd = ii.size
-
-            # Put the co-located values together
-            nvalues = aggregate(indices,
-                                v.values[region_list][valid_list][
-                                    time_list][valid_data],
-                                func='mean')
-
-            # Get their variance
-            vari = aggregate(indices,
-                             v.values[region_list][valid_list][
-                                 time_list][valid_data],
-                             func='var')
-
-            # Put together the known observation values
-            if v.error is not None:
-                errs = aggregate(indices,
-                                 v.error[region_list][valid_list][
-                                     time_list][valid_data]**2,
-                                 func='mean')
-                errs = errs[binned].flatten()
-            else:
-                errs = 0.0
-
-            # Build the depth vectors
-            if subsurface_values:
-                dd = aggregate(indices, depth[time_list][valid_data],
-                               func='mean')
-                kk = aggregate(indices, k[time_list][valid_data],
-                               func='mean')
-                dd = dd[binned].ravel()
-                # ROMS counts from 1 for depth layers
-                kk = kk[binned].ravel() + 1
-            else:
-                kk = np.resize(grid.n, Nd)
-                dd = kk
-
-            # Put all of the data from this time into our lists
-            ot.append(np.resize(mtime, Nd))
-            ox.append(ii)
-            oy.append(jj)
-            oz.append(kk)
-            odep.append(dd)
-            olon.append(lonl)
-            olat.append(latl)
-            oval.append(nvalues[binned].flatten())
-            otype.append(np.resize(seapy.roms.obs.astype(v.type), Nd))
-            oprov.append(np.resize(
-                seapy.roms.obs.asprovenance(v.provenance), Nd))
-            oerr.append(np.maximum(v.min_error**2,
-                                   np.maximum(vari[binned].flatten(),
-                                              errs)))
-
-    # Make sure that we have something relevant
-    if not oval:
+    dtime -= np.min(dtime)
+    dtime = dtime.astype(int)
+
+    # The time of each bin is the mean time of all observations within it
+    mtime = aggregate(dtime, time, func='mean', fill_value=np.nan)
+
+    # Each observation is keyed by its time bin, its data type, and the
+    # grid cell (k, j, i) that it falls in. Sorting the keys puts the
+    # observations that are to be combined next to each other in the order
+    # that the results are wanted.
+    cell = (np.floor(j).astype(int), np.floor(i).astype(int))
+    if subsurface_values:
+        cell = (np.floor(k).astype(int),) + cell
+    cell_dims = tuple(np.max(c) + 1 for c in cell)
+    cell = np.ravel_multi_index(cell, cell_dims)
+    dims = (np.max(dtime) + 1, len(data), np.prod(cell_dims))
+    keys = []
+    obs_list = []
+    for n, v in enumerate(data):
+        values = np.ma.ravel(v.values)[points]
+        l = np.flatnonzero(~np.ma.getmaskarray(values))
+        keys.append(np.ravel_multi_index(
+            (dtime[l], np.full(l.size, n), cell[l]), dims))
+        obs_list.append(l)
+    key = np.concatenate(keys)
+    del keys
+    if not key.size:
         return None
+    order = np.argsort(key, kind='mergesort')
+    key = key[order]
+    start = np.flatnonzero(np.r_[True, np.diff(key) > 0])
+    count = np.diff(np.r_[start, key.size])
+    tbin, vbin, _ = np.unravel_index(key[start], dims)
+    del key
+    src = np.concatenate(obs_list)[order]
+
+    def _mean(x):
+        return np.add.reduceat(x, start) / count
+
+    # Grid the data onto our grid and compute the mean and variance
+    ii = _mean(i[src])
+    jj = _mean(j[src])
+    (latl, lonl) = grid.latlon((ii, jj))
+    vals = np.concatenate([np.ma.ravel(v.values)[points][l].data
+                           for v, l in zip(data, obs_list)])[order]
+    nvalues = _mean(vals)
+    vari = _mean((vals - np.repeat(nvalues, count))**2)
+    del vals
+
+    # Put together the known observation values
+    errs = np.concatenate([np.zeros(l.size) if v.error is None else
+                           np.ma.ravel(v.error)[points][l]**2
+                           for v, l in zip(data, obs_list)])[order]
+    errs = _mean(errs)
+
+    # Build the depth vectors
+    if subsurface_values:
+        dd = _mean(depth[src])
+        # ROMS counts from 1 for depth layers
+        kk = _mean(k[src]) + 1
+    else:
+        kk = np.resize(grid.n, ii.size)
+        dd = kk
+
+    # Look up the properties of each bin's data type
+    otype = np.array([astype(v.type)[0] for v in data])[vbin]
+    oprov = np.array([asprovenance(v.provenance)[0] for v in data])[vbin]
+    min_err = np.array([v.min_error**2 for v in data])[vbin]
 
     # Put everything together and create an observation class
-    return seapy.roms.obs.obs(time=np.hstack(ot).ravel(),
-                              x=np.hstack(ox).ravel(),
-                              y=np.hstack(oy).ravel(),
-                              z=np.hstack(oz).ravel(),
-                              lat=np.hstack(olat).ravel(),
-                              lon=np.hstack(olon).ravel(),
-                              depth=np.hstack(odep).ravel(),
-                              value=np.hstack(oval).ravel(),
-                              error=np.hstack(oerr).ravel(),
-                              type=np.hstack(otype).ravel(),
-                              provenance=np.hstack(oprov).ravel(),
+    return seapy.roms.obs.obs(time=mtime[tbin],
+                              x=ii,
+                              y=jj,
+                              z=kk,
+                              lat=latl,
+                              lon=lonl,
+                              depth=dd,
+                              value=nvalues,
+                              error=np.maximum(min_err,
+                                               np.maximum(vari, errs)),
+                              type=otype,
+                              provenance=oprov,
                               title=title)
 
 
-def merge_files(obs_files, out_files, days, dt, limits=None, clobber=True):
+def merge_files(obs_files, out_files, days, dt, limits=None, clobber=True,
+                duplicates=None):
     """
     merge together a group of observation files into combined new files
-    with observations that lie only within the corresponding dates
+    with observations that lie only within the corresponding dates.
+
+    Each input file is read only once (and only for the records that are
+    needed): its observations are sorted and handed out to every period
+    that it covers. Each output file is written as soon as no remaining
+    input file can contribute to it.
 
     Parameters
     ----------
@@ -821,6 +1855,10 @@ def merge_files(obs_files, out_files, days, dt, limits=None, clobber=True):
         valid grid range to accept obs within.
     clobber: bool, optional
         If True, output files are overwritten. If False, they are skipped.
+    duplicates: string, optional
+        If given, the policy used to resolve duplicate observations within
+        each output file (see obs.remove_duplicates). Observations from
+        files that start later are considered newer.
 
     Returns
     -------
@@ -851,11 +1889,11 @@ def merge_files(obs_files, out_files, days, dt, limits=None, clobber=True):
     if isinstance(out_files, str):
         outtime = True
         time = re.compile('\#')
+    tstart = np.array([t[0] for t in days])
+    tend = np.array([t[1] for t in days])
 
     # Go through the files to determine which periods they cover
-    myobs = list()
-    sdays = list()
-    edays = list()
+    spans = list()
     for file in obs_files:
         nc = seapy.netcdf(file)
         fdays = nc.variables['survey_time'][:]
@@ -864,46 +1902,45 @@ def merge_files(obs_files, out_files, days, dt, limits=None, clobber=True):
                                     fdays <= np.max(days)))[0]
         if not l.size:
             continue
-        myobs.append(file)
-        sdays.append(fdays[0])
-        edays.append(fdays[-1])
-    sdays = np.asarray(sdays)
-    edays = np.asarray(edays)
-
-    # Loop over the dates in pairs
-    for n, t in enumerate(seapy.progressbar.progress(days)):
-        # Set output file name
+        spans.append((np.min(fdays), np.max(fdays), file))
+    spans.sort()
+
+    # Set the output file names for each period, skipping any that exist
+    pending = dict()
+    for n, t in enumerate(days):
         if outtime:
             outfile = time.sub("{:05d}".format(t[0]), out_files)
         else:
             outfile = out_files[n]
-
         if os.path.exists(outfile) and not clobber:
             continue
-
-        # Find the files that cover the current period
-        fidx = np.where(np.logical_and(sdays <= t[1], edays >= t[0]))[0]
-        if not fidx.size:
-            continue
-
-        # Create new observations for this time period
-        nobs = obs(myobs[fidx[0]])
-        l = np.where(np.logical_or(nobs.time < t[0], nobs.time > t[1]))
-        nobs.delete(l)
-        for idx in fidx[1:]:
-            o = obs(myobs[idx])
-            l = np.where(np.logical_and(o.time >= t[0], o.time <= t[1]))
-            nobs.add(o[l])
-        # Remove any limits
-        if limits is not None:
-            l = np.where(np.logical_or.reduce((
-                nobs.x < limits['west'],
-                nobs.x > limits['east'],
-                nobs.y < limits['south'],
-                nobs.y > limits['north'])))
-            nobs.delete(l)
-
-        # Save out the new observations
-        nobs.to_netcdf(outfile, dt=dt)
-
-        pass
+        pending[n] = [outfile, None]
+
+    # Stream through the files in time order
+    for k, (sday, eday, file) in enumerate(seapy.progressbar.progress(spans)):
+        periods = [n for n in pending
+                   if tstart[n] <= eday and tend[n] >= sday]
+        if periods:
+            o = read(file, np.min(tstart[periods]), np.max(tend[periods]),
+                     limits=limits)
+            if o is not None:
+                o = o[np.argsort(o.time, kind='mergesort')]
+                lo = np.searchsorted(o.time, tstart[periods], side='left')
+                hi = np.searchsorted(o.time, tend[periods], side='right')
+                for n, a, b in zip(periods, lo, hi):
+                    if a == b:
+                        continue
+                    if pending[n][1] is None:
+                        # Periods may overlap, so each needs its own copy
+                        pending[n][1] = o[a:b].copy()
+                    else:
+                        pending[n][1].add(o[a:b])
+
+        # Save out the periods that no later file can contribute to
+        nday = spans[k + 1][0] if k + 1 < len(spans) else np.inf
+        for n in [n for n in pending if tend[n] < nday]:
+            outfile, nobs = pending.pop(n)
+            if nobs is not None:
+                if duplicates is not None:
+                    nobs.remove_duplicates(policy=duplicates)
+                nobs.to_netcdf(outfile, dt=dt)
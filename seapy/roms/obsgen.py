@@ -244,11 +244,95 @@ class obsgen(object):
 
         return None, None
 
+    def datespan_files(self, files, catalog=None, n_jobs=1):
+        """
+        Return the date span of each of the given files. If a catalog is
+        given, the spans are kept in it (a JSON file keyed by the path,
+        size, and modification time of each file), so that only the files
+        that are new or have changed are checked again.
+
+        Parameters
+        ----------
+        files : list of strings,
+            filenames of the files to check
+        catalog : string, optional
+            filename of the catalog to use and update
+        n_jobs : int, optional
+            number of processes to check the files with. If -1, use all
+            of the processors.
+
+        Returns
+        -------
+        spans : list of tuples,
+            (start, end) datetimes of each file
+
+        Examples
+        --------
+        >>> spans = gen.datespan_files(files, catalog="sst_catalog.json")
+        """
+        import os
+        import json
+        from joblib import Parallel, delayed
+
+        # Load the entries for this type of file from the catalog
+        entries = {}
+        if catalog is not None and os.path.isfile(catalog):
+            with open(catalog, "r") as f:
+                entries = json.load(f)
+        known = entries.setdefault(type(self).__name__, {})
+
+        spans = [None] * len(files)
+        keys, stamps, probe = [], [], []
+        for n, file in enumerate(files):
+            key = os.path.abspath(file)
+            try:
+                st = os.stat(file)
+                stamp = [st.st_size, st.st_mtime]
+            except OSError:
+                # Leave missing files to be reported when they are used
+                spans[n] = (None, None)
+                stamp = None
+            keys.append(key)
+            stamps.append(stamp)
+            if stamp is None:
+                continue
+            if known.get(key, [None] * 2)[:2] == stamp:
+                spans[n] = tuple(None if d is None else
+                                 datetime.datetime.fromisoformat(d)
+                                 for d in known[key][2:])
+            else:
+                probe.append(n)
+
+        # Check the new files, and save them into the catalog
+        if probe:
+            try:
+                new = Parallel(n_jobs=n_jobs, return_as="generator")(
+                    delayed(_datespan_file)(self, files[n]) for n in probe)
+                for n, (span, error) in zip(probe, new):
+                    if error is not None:
+                        warn("WARNING: {:s} cannot be checked.\nError: {:}"
+                             .format(files[n], error))
+                    spans[n] = span
+                    known[keys[n]] = stamps[n] + \
+                        [None if d is None else d.isoformat() for d in span]
+            finally:
+                # Keep the files that were checked, even if others failed
+                if catalog is not None:
+                    with open(catalog + ".tmp", "w") as f:
+                        json.dump(entries, f)
+                    os.replace(catalog + ".tmp", catalog)
+            for n in probe:
+                if spans[n] is None:
+                    spans[n] = (None, None)
+        return spans
+
     def batch_files(self, in_files, out_files, start_time=None,
-                    end_time=None, clobber=True):
+                    end_time=None, clobber=True, n_jobs=1, catalog=None):
         """
         Given a list of input files, process each one and save each result
-        into the given output file.
+        into the given output file. The files may be converted in parallel
+        processes; the results are saved and reported in the order of the
+        input files.
 
         Parameters
         ----------
@@ -269,17 +353,28 @@ class obsgen(object):
         clobber : bool, optional
             If TRUE, overwrite any existing output files. If False, the
             file is given a letter suffix.
+        n_jobs : int, optional
+            number of processes to convert the files with. If -1, use all
+            of the processors.
+        catalog : string, optional
+            filename of a catalog of the date spans of the files (see
+            datespan_files) to use when start_time is given
 
         Returns
         -------
         None
+
+        Examples
+        --------
+        Convert a year of daily files with four processes
+
+        >>> gen.batch_files(files, "sst_#.nc", n_jobs=4)
         """
         import re
         import os
+        from joblib import Parallel, delayed
 
-        datecheck = False
         if start_time is not None:
-            datecheck = True
             if end_time is None:
                 end_time = start_time + datetime.timedelta(1)
 
@@ -288,21 +383,50 @@ class obsgen(object):
             outtime = True
             time = re.compile('\#')
 
-        for n, file in enumerate(in_files):
+        # Skip the files outside of the times using the catalog
+        skip = [False] * len(in_files)
+        if start_time is not None and catalog is not None:
+            skip = [(en is not None and en < start_time) or
+                    (st is not None and st > end_time)
+                    for st, en in self.datespan_files(in_files, catalog,
+                                                      n_jobs)]
+            start_time = None
+
+        def _convert(files):
+            # Convert the files in order. If the pool fails (e.g., a worker
+            # dies), convert the next file on its own so that the failure
+            # is reported with it, and start a new pool for the rest.
+            while files:
+                try:
+                    for r in Parallel(n_jobs=n_jobs, return_as="generator")(
+                            delayed(_convert_file)(self, f, start_time,
+                                                   end_time) for f in files):
+                        files = files[1:]
+                        yield r
+                except Exception:
+                    try:
+                        r = Parallel(n_jobs=n_jobs)(
+                            [delayed(_convert_file)(self, files[0],
+                                                    start_time, end_time)])[0]
+                    except Exception as e:
+                        r = ("ERROR", "{:}".format(e))
+                    files = files[1:]
+                    yield r
+
+        # Convert the files in parallel, but save them in order, as the
+        # names of the output files may depend upon those already saved
+        converted = _convert([f for f, s in zip(in_files, skip) if not s])
+        results = (("SKIPPED", None) if s else next(converted) for s in skip)
+        for n, (file, (status, obs)) in enumerate(zip(in_files, results)):
             try:
-                # Check the times if user requested
                 print(file, end="")
-                if datecheck:
-                    st, en = self.datespan_file(file)
-                    if (en is not None and en < start_time) or \
-                            (st is not None and st > end_time):
-                        print(": SKIPPED")
-                        continue
-
-                # Convert the file
-                obs = self.convert_file(file)
-                if obs is None:
-                    print(": NO OBS")
+                if status == "ERROR":
+                    print(": ERROR")
+                    warn("WARNING: {:s} cannot be processed.\nError: {:}".format(
+                        file, obs))
+                    continue
+                if status is not None:
+                    print(": " + status)
                     continue
 
                 # Output the obs to the correct file
@@ -329,12 +453,192 @@ class obsgen(object):
         pass
 
 
+def _datespan_file(gen, file):
+    """
+    PRIVATE method: check the date span of a single file for
+    obsgen.datespan_files, which may be run in another process. A file
+    that cannot be checked is given no span, and the error is returned to
+    be reported with it.
+
+    Returns
+    -------
+    span : tuple,
+        (start, end) datetimes of the file
+    error : string,
+        the error if the file cannot be checked, else None
+    """
+    try:
+        return tuple(gen.datespan_file(file)), None
+    except Exception as e:
+        return (None, None), "{:}".format(e.args)
+
+
+def _convert_file(gen, file, start_time=None, end_time=None):
+    """
+    PRIVATE method: convert a single file for obsgen.batch_files, which may
+    be run in another process. Errors are returned rather than raised so
+    that they are reported with the file that caused them.
+
+    Returns
+    -------
+    status : string,
+        "SKIPPED" or "NO OBS" if there is nothing to save, "ERROR" if the
+        file cannot be converted, else None
+    obs : seapy.roms.obs.obs or string,
+        converted observations, or the error message if status is "ERROR"
+    """
+    try:
+        # Check the times if user requested
+        if start_time is not None:
+            st, en = gen.datespan_file(file)
+            if (en is not None and en < start_time) or \
+                    (st is not None and st > end_time):
+                return "SKIPPED", None
+
+        # Convert the file
+        obs = gen.convert_file(file)
+        if obs is None:
+            return "NO OBS", None
+        return None, obs
+    except (Exception, UserWarning) as e:
+        return "ERROR", "{:}".format(e.args)
+
+
 ##############################################################################
 #
 # REMOTE-SENSING DATA
 #
 ##############################################################################
 
+# Number of rows of a swath to read at a time
+_swath_block_rows = 512
+
+# Grid indices of the pixels of fixed-grid products that have been found,
+# kept for each process so that every file of a product reuses them
+_source_ij_cache = {}
+_source_ij_cache_size = 4
+
+
+def _source_ij(grid, lon, lat):
+    """
+    PRIVATE method: find the fractional (j, i) indices of the grid for the
+    pixels of a gridded (L3) product. As every file of a product has the
+    same pixels, the indices are found once for each product and grid and
+    then looked up.
+
+    Parameters
+    ----------
+    grid : seapy.model.grid,
+        grid to place the pixels onto
+    lon : ndarray,
+        longitudes of the product
+    lat : ndarray,
+        latitudes of the product
+
+    Returns
+    -------
+    (j, i) : tuple of masked arrays,
+        grid indices of each pixel of shape (lat.size, lon.size); pixels
+        that are not on the grid are masked
+    """
+    import hashlib
+
+    # The grid is known by its file (or, if constructed, by the grid
+    # itself, which is kept with the indices so that its id is not reused)
+    # and the product by its pixels
+    lon = np.ma.getdata(lon).ravel()
+    lat = np.ma.getdata(lat).ravel()
+    pixels = hashlib.sha1()
+    for v in (lon, lat):
+        pixels.update(np.ascontiguousarray(v).tobytes())
+    if grid.filename:
+        key = (tuple(np.atleast_1d(grid.filename)), grid.lon_rho.shape)
+    else:
+        key = id(grid)
+    key = (key, pixels.hexdigest())
+
+    if key not in _source_ij_cache:
+        j = np.ma.masked_all((lat.size, lon.size))
+        i = np.ma.masked_all((lat.size, lon.size))
+        jr = np.flatnonzero(np.logical_and(lat >= np.min(grid.lat_rho),
+                                           lat <= np.max(grid.lat_rho)))
+        ir = np.flatnonzero(np.logical_and(lon >= np.min(grid.lon_rho),
+                                           lon <= np.max(grid.lon_rho)))
+        if jr.size and ir.size:
+            region = np.ix_(jr, ir)
+            plon, plat = np.meshgrid(lon[ir], lat[jr])
+            j[region], i[region] = (v.reshape(plon.shape) for v in
+                                    grid.ij((plon.ravel(), plat.ravel())))
+        if len(_source_ij_cache) >= _source_ij_cache_size:
+            _source_ij_cache.pop(next(iter(_source_ij_cache)))
+        _source_ij_cache[key] = (grid, j, i)
+    return _source_ij_cache[key][1:]
+
+
+def _ssh_mean_field(grid, ssh_mean):
+    """
+    PRIVATE method: extend the model mean SSH over the mask and fill any
+    remaining gaps by objective analysis, so that the field is computed
+    once and then sampled at the observations with _ssh_mean_sample.
+    """
+    field = seapy.convolve_mask(ssh_mean, ksize=5, copy=True)
+    gaps = np.ma.getmaskarray(field)
+    if np.any(gaps) and not np.all(gaps):
+        fill, _ = seapy.oasurf(grid.I, grid.J, field, grid.I[gaps],
+                               grid.J[gaps], nx=1, ny=1, weight=7)
+        field[gaps] = fill
+    return field
+
+
+def _ssh_mean_sample(grid, field, x, y):
+    """
+    PRIVATE method: bilinearly interpolate the mean SSH field from
+    _ssh_mean_field to the fractional grid indices (x, y)
+    """
+    from scipy.interpolate import RegularGridInterpolator
+
+    return RegularGridInterpolator((grid.J[:, 0], grid.I[0, :]),
+                                   np.ma.filled(field, np.nan),
+                                   bounds_error=False,
+                                   fill_value=None)((y, x))
+
+
+def _swath_blocks(grid, nc, rows=_swath_block_rows):
+    """
+    PRIVATE method: read the coordinates of a swath in blocks of rows and
+    return only the blocks that fall within the bounding box of the grid,
+    so that the data of the rest of the swath need not be read.
+
+    Parameters
+    ----------
+    grid : seapy.model.grid,
+        grid to test the swath against
+    nc : netCDF4.Dataset,
+        swath file with lon and lat of (row, column)
+    rows : int, optional
+        number of rows in each block
+
+    Returns
+    -------
+    generator of (rows, lon, lat),
+        slice of the rows of each block and its coordinates
+    """
+    east = grid.east()
+    lonmin, lonmax = np.min(grid.lon_rho), np.max(grid.lon_rho)
+    latmin, latmax = np.min(grid.lat_rho), np.max(grid.lat_rho)
+    nrows = nc.variables["lat"].shape[0]
+    for r in range(0, nrows, rows):
+        block = slice(r, min(r + rows, nrows))
+        lat = np.ma.masked_invalid(nc.variables["lat"][block, :])
+        if lat.count() == 0 or lat.max() < latmin or lat.min() > latmax:
+            continue
+        lon = np.ma.masked_invalid(nc.variables["lon"][block, :])
+        if east:
+            lon[lon < 0] += 360
+        if lon.count() == 0 or lon.max() < lonmin or lon.min() > lonmax:
+            continue
+        yield block, lon, lat
+
 class aquarius_sss(obsgen):
     """
     class to process Aquarius SSS HDF5 files into ROMS observation
@@ -382,14 +686,16 @@ class aquarius_sss(obsgen):
         dlon = f.attrs['Longitude Step']
         f.close()
 
-        [lon, lat] = np.meshgrid(np.arange(wlon, elon + dlon, dlon),
-                                 np.arange(slat, nlat + dlat, dlat))
+        lon = np.arange(wlon, elon + dlon, dlon)
+        lat = np.arange(slat, nlat + dlat, dlat)
         time = (datetime.datetime(year, 1, 1) + datetime.timedelta(int(day)) -
                 self.epoch).days
-        lat = lat.flatten()
-        lon = lon.flatten()
         if self.grid.east():
             lon[lon < 0] += 360
+        ij = _source_ij(self.grid, lon, lat)
+        [lon, lat] = np.meshgrid(lon, lat)
+        lat = lat.flatten()
+        lon = lon.flatten()
 
         salt = np.ma.masked_outside(salt.flatten(), self.salt_limits[0],
                                     self.salt_limits[1])
@@ -397,8 +703,7 @@ class aquarius_sss(obsgen):
                                         salt, None, self.salt_error)]
         # Grid it
         return seapy.roms.obs.gridder(self.grid, time, lon, lat, None,
-                                      data, self.dt, title)
-        pass
+                                      data, self.dt, title=title, ij=ij)
 
 
 class aviso_sla_map(obsgen):
@@ -410,12 +715,12 @@ class aviso_sla_map(obsgen):
 
     def __init__(self, grid, dt, reftime=seapy.default_epoch, ssh_mean=None,
                  ssh_error=0.05):
+        self.ssh_error = ssh_error
+        super().__init__(grid, dt, reftime)
         if ssh_mean is not None:
-            self.ssh_mean = seapy.convolve_mask(ssh_mean, ksize=5, copy=True)
+            self.ssh_mean = _ssh_mean_field(self.grid, ssh_mean)
         else:
             self.ssh_mean = None
-        self.ssh_error = ssh_error
-        super().__init__(grid, dt, reftime)
 
     def datespan_file(self, file):
         nc = seapy.netcdf(file)
@@ -443,25 +748,25 @@ class aviso_sla_map(obsgen):
         lat = nc.variables[latname][:]
         dat = np.squeeze(nc.variables["sla"][:])
         err = np.squeeze(nc.variables["err"][:])
-        time = seapy.roms.get_time(
+        time = seapy.roms.num2date(
             nc, "time", records=[0], epoch=self.epoch)[0]
         nc.close()
+        if not self.grid.east():
+            lon[lon > 180] -= 360
+        ij = _source_ij(self.grid, lon, lat)
         lon, lat = np.meshgrid(lon, lat)
         lat = lat.flatten()
         lon = lon.flatten()
-        if not self.grid.east():
-            lon[lon > 180] -= 360
         data = [seapy.roms.obs.raw_data("ZETA", "SSH_AVISO_MAP",
                                         dat.flatten(), err.flatten(), self.ssh_error)]
         # Grid it
         obs = seapy.roms.obs.gridder(self.grid, time, lon, lat, None,
-                                     data, self.dt, title)
+                                     data, self.dt, title=title, ij=ij)
 
         # Apply the model mean ssh to the sla data
-        if self.ssh_mean is not None:
-            m, p = seapy.oasurf(self.grid.I, self.grid.J, self.ssh_mean,
-                                obs.x, obs.y, nx=1, ny=1, weight=7)
-            obs.value += m
+        if self.ssh_mean is not None and obs is not None:
+            obs.value += _ssh_mean_sample(self.grid, self.ssh_mean,
+                                          obs.x, obs.y)
         return obs
 
 
@@ -505,11 +810,11 @@ class aviso_sla_track(obsgen):
         self.provenance = provenance.upper()
         self.repeat = repeat
         self.ssh_error = ssh_error if ssh_error else _aviso_sla_errors
+        super().__init__(grid, dt, reftime)
         if ssh_mean is not None:
-            self.ssh_mean = seapy.convolve_mask(ssh_mean, ksize=5, copy=True)
+            self.ssh_mean = _ssh_mean_field(self.grid, ssh_mean)
         else:
             self.ssh_mean = None
-        super().__init__(grid, dt, reftime)
 
     def convert_file(self, file, title="AVISO SLA Track Obs"):
         """
@@ -538,13 +843,12 @@ class aviso_sla_track(obsgen):
                                         dat[good], err[good], err[0])]
         # Grid it
         obs = seapy.roms.obs.gridder(self.grid, time, lon[good], lat[good], None,
-                                     data, self.dt, title)
+                                     data, self.dt, title=title)
 
         # Apply the model mean ssh to the sla data
         if self.ssh_mean is not None and obs is not None:
-            m, p = seapy.oasurf(self.grid.I, self.grid.J, self.ssh_mean,
-                                obs.x, obs.y, nx=1, ny=1, weight=7)
-            obs.value += m
+            obs.value += _ssh_mean_sample(self.grid, self.ssh_mean,
+                                          obs.x, obs.y)
 
         # Duplicate the observations before and after as per the repeat
         # time unless it is zero
@@ -594,15 +898,15 @@ class ostia_sst_map(obsgen):
         nc.close()
         if self.grid.east():
             lon[lon < 0] += 360
+        j, i = _source_ij(self.grid, lon, lat)
         lon, lat = np.meshgrid(lon, lat)
         good = dat.nonzero()
-        lat = lat[good]
-        lon = lon[good]
-        data = [seapy.roms.obs.raw_data("TEMP", "SST_OSTIA", dat.compressed(),
+        data = [seapy.roms.obs.raw_data("TEMP", "SST_OSTIA", dat[good],
                                         err[good], self.temp_error)]
         # Grid it
-        return seapy.roms.obs.gridder(self.grid, time, lon, lat, None,
-                                      data, self.dt, title)
+        return seapy.roms.obs.gridder(self.grid, time, lon[good], lat[good],
+                                      None, data, self.dt, title=title,
+                                      ij=(j[good], i[good]))
 
 
 class navo_sst_map(obsgen):
@@ -662,15 +966,15 @@ class navo_sst_map(obsgen):
         # here we set the depth to be 4 m below the surface
         if self.grid.east():
             lon[lon < 0] += 360
+        j, i = _source_ij(self.grid, lon, lat)
         lon, lat = np.meshgrid(lon, lat)
         good = dat.nonzero()
-        lat = lat[good]
-        lon = lon[good]
-        data = [seapy.roms.obs.raw_data("TEMP", self.provenance, dat.compressed(),
+        data = [seapy.roms.obs.raw_data("TEMP", self.provenance, dat[good],
                                         err[good], self.temp_error)]
         # Grid it
-        obs = seapy.roms.obs.gridder(self.grid, time, lon, lat, None,
-                                     data, self.dt, depth_adjust=True, title=title)
+        obs = seapy.roms.obs.gridder(self.grid, time, lon[good], lat[good],
+                                     None, data, self.dt, depth_adjust=True,
+                                     title=title, ij=(j[good], i[good]))
         obs.z *= 0
         obs.depth = -self.depth * np.ones(len(obs.depth))
         return obs
@@ -720,15 +1024,15 @@ class modis_sst_map(obsgen):
 
         if self.grid.east():
             lon[lon < 0] += 360
+        j, i = _source_ij(self.grid, lon, lat)
         lon, lat = np.meshgrid(lon, lat)
         good = dat.nonzero()
-        lat = lat[good]
-        lon = lon[good]
-        data = [seapy.roms.obs.raw_data("TEMP", self.provenance, dat.compressed(),
+        data = [seapy.roms.obs.raw_data("TEMP", self.provenance, dat[good],
                                         err[good], self.temp_error)]
         # Grid it
-        return seapy.roms.obs.gridder(self.grid, time, lon, lat, None,
-                                      data, self.dt, title)
+        return seapy.roms.obs.gridder(self.grid, time, lon[good], lat[good],
+                                      None, data, self.dt, title=title,
+                                      ij=(j[good], i[good]))
 
 
 class remss_swath(obsgen):
@@ -755,38 +1059,57 @@ class remss_swath(obsgen):
         """
         # Load REMSS Data
         nc = seapy.netcdf(file)
-        lon = nc.variables["lon"][:]
-        lat = nc.variables["lat"][:]
-        dat = np.ma.masked_outside(np.squeeze(
-            nc.variables["sea_surface_temperature"][:]) - 273.15,
-            self.temp_limits[0], self.temp_limits[1])
-        err = np.ma.masked_outside(np.squeeze(
-            nc.variables["sses_standard_deviation"][:]), 0.01, 2.0)
-        dat[err.mask] = np.ma.masked
-
-        # Check the data flags
-        if self.check_qc_flags:
-            flags = np.ma.masked_not_equal(
-                np.squeeze(nc.variables["quality_level"][:]), 5)
-            dat[flags.mask] = np.ma.masked
-        else:
-            dat = np.ma.masked_where(
-                np.squeeze(nc.variables["quality_level"][:]).data == 1, dat)
-
-        # Grab the observation time
-        time = seapy.roms.num2date(nc, "time", records=[0])[0] - self.epoch
-        dtime = nc.variables["sst_dtime"][:]
-        time = np.squeeze((time.total_seconds() + dtime) * seapy.secs2day)
+        time0 = (seapy.roms.num2date(nc, "time", records=[0])[0] -
+                 self.epoch).total_seconds()
+
+        def _rows(var, block):
+            var = nc.variables[var]
+            return var[0, block, :] if var.ndim == 3 else var[block, :]
+
+        # Only read the blocks of the swath over the grid
+        time, lon, lat, value, error = [], [], [], [], []
+        for block, blon, blat in _swath_blocks(self.grid, nc):
+            dat = np.ma.masked_outside(
+                _rows("sea_surface_temperature", block) - 273.15,
+                self.temp_limits[0], self.temp_limits[1])
+            err = np.ma.masked_outside(
+                _rows("sses_standard_deviation", block), 0.01, 2.0)
+            dat[err.mask] = np.ma.masked
+
+            # Check the data flags
+            if self.check_qc_flags:
+                flags = np.ma.masked_not_equal(
+                    _rows("quality_level", block), 5)
+                dat[flags.mask] = np.ma.masked
+            else:
+                dat = np.ma.masked_where(
+                    _rows("quality_level", block).data == 1, dat)
+            dat[np.ma.getmaskarray(blon) | np.ma.getmaskarray(blat)] = \
+                np.ma.masked
+
+            # Grab the observation time
+            good = dat.nonzero()
+            if not good[0].size:
+                continue
+            dtime = _rows("sst_dtime", block)
+            time.append((time0 + dtime[good]) * seapy.secs2day)
+            lon.append(blon[good])
+            lat.append(blat[good])
+            value.append(dat[good])
+            error.append(err[good])
         nc.close()
-        if self.grid.east():
-            lon[lon < 0] += 360
-        good = dat.nonzero()
+        if not value:
+            return None
+
         data = [seapy.roms.obs.raw_data("TEMP", self.provenance,
-                                        dat.compressed(),
-                                        err[good], self.temp_error)]
+                                        np.ma.concatenate(value),
+                                        np.ma.concatenate(error),
+                                        self.temp_error)]
         # Grid it
-        return seapy.roms.obs.gridder(self.grid, time[good], lon[good], lat[good],
-                                      None, data, self.dt, title)
+        return seapy.roms.obs.gridder(self.grid, np.ma.concatenate(time),
+                                      np.ma.concatenate(lon),
+                                      np.ma.concatenate(lat),
+                                      None, data, self.dt, title=title)
 
 
 class remss_map(obsgen):
@@ -814,42 +1137,45 @@ class remss_map(obsgen):
         nc = seapy.netcdf(file)
         lon = nc.variables["lon"][:]
         lat = nc.variables["lat"][:]
-        dat = np.ma.masked_outside(np.squeeze(
-            nc.variables["sea_surface_temperature"][:]) - 273.15,
-            self.temp_limits[0], self.temp_limits[1])
-        err = np.ma.masked_outside(np.squeeze(
-            nc.variables["SSES_standard_deviation_error"][:]), 0.01, 2.0)
+        shape = (-1, lat.size, lon.size)
+        dat = np.ma.masked_outside(
+            nc.variables["sea_surface_temperature"][:].reshape(shape) -
+            273.15, self.temp_limits[0], self.temp_limits[1])
+        err = np.ma.masked_outside(
+            nc.variables["SSES_standard_deviation_error"][:].reshape(shape),
+            0.01, 2.0)
         dat[err.mask] = np.ma.masked
 
         # Check the data flags
         flags = np.ma.masked_not_equal(
-            np.squeeze(nc.variables["rejection_flag"][:]), 0)
+            nc.variables["rejection_flag"][:].reshape(shape), 0)
         dat[flags.mask] = np.ma.masked
         err[flags.mask] = np.ma.masked
 
         # Grab the observation time
         time = seapy.roms.num2date(nc, "time", epoch=self.epoch)
-        sst_time = nc.variables["sst_dtime"][:] * seapy.secs2day
-        for n, i in enumerate(time):
-            sst_time[n, :, :] += i
-        sst_time[dat.mask] = np.ma.masked
-
-        # Set up the coordinate
-        lon, lat = np.meshgrid(lon, lat)
-        lon = np.ma.masked_where(dat.mask, seapy.adddim(lon, len(time)))
-        lat = np.ma.masked_where(dat.mask, seapy.adddim(lat, len(time)))
+        sst_time = nc.variables["sst_dtime"][:].reshape(shape) * \
+            seapy.secs2day
+        for n, t in enumerate(time):
+            sst_time[n, :, :] += t
 
         nc.close()
 
+        # Set up the coordinate
         if self.grid.east():
             lon[lon < 0] += 360
+        j, i = _source_ij(self.grid, lon, lat)
+        lon, lat = np.meshgrid(lon, lat)
+        lon, lat, j, i = (seapy.adddim(v, len(time)) for v in (lon, lat, j, i))
+        good = ~np.ma.getmaskarray(dat)
         data = [seapy.roms.obs.raw_data("TEMP", self.provenance,
-                                        dat.compressed(),
-                                        err.compressed(), self.temp_error)]
+                                        dat[good], err[good],
+                                        self.temp_error)]
         # Grid it
-        return seapy.roms.obs.gridder(self.grid, sst_time.compressed(),
-                                      lon.compressed(), lat.compressed, None,
-                                      data, self.dt, title)
+        return seapy.roms.obs.gridder(self.grid, sst_time[good],
+                                      lon[good], lat[good], None,
+                                      data, self.dt, title=title,
+                                      ij=(j[good], i[good]))
 
 
 class viirs_swath(obsgen):
@@ -876,45 +1202,57 @@ class viirs_swath(obsgen):
         """
         # Load VIIRS Data
         nc = seapy.netcdf(file, aggdim="time")
-        lon = nc.variables["lon"][:]
-        lat = nc.variables["lat"][:]
-        dat = np.ma.masked_outside(
-            nc.variables["sea_surface_temperature"][:] - 273.15,
-            self.temp_limits[0], self.temp_limits[1])
-        err = np.ma.masked_outside(
-            nc.variables["sses_standard_deviation"][:], 0.01, 2.0)
-        dat[err.mask] = np.ma.masked
-
-        # Check the data flags
-        if self.check_qc_flags:
-            flags = np.ma.masked_not_equal(
-                nc.variables["quality_level"][:], 5)
-            dat[flags.mask] = np.ma.masked
-        else:
-            dat = np.ma.masked_where(
-                nc.variables["quality_level"][:].data == 1, dat)
-
-        # Grab the observation time
-        time = netCDF4.num2date(nc.variables["time"][:],
-                                nc.variables["time"].units) - self.epoch
-        time = np.asarray([x.total_seconds() for x in time])[
+        time0 = netCDF4.num2date(nc.variables["time"][:],
+                                 nc.variables["time"].units) - self.epoch
+        time0 = np.asarray([x.total_seconds() for x in time0])[
             :, np.newaxis, np.newaxis]
-        dtime = nc.variables["sst_dtime"][:]
-        time = (time + dtime) * seapy.secs2day
+
+        # Only read the blocks of the swath over the grid
+        time, lon, lat, value, error = [], [], [], [], []
+        for block, blon, blat in _swath_blocks(self.grid, nc):
+            dat = np.ma.masked_outside(
+                nc.variables["sea_surface_temperature"][:, block, :] -
+                273.15, self.temp_limits[0], self.temp_limits[1])
+            err = np.ma.masked_outside(
+                nc.variables["sses_standard_deviation"][:, block, :],
+                0.01, 2.0)
+            dat[err.mask] = np.ma.masked
+
+            # Check the data flags
+            if self.check_qc_flags:
+                flags = np.ma.masked_not_equal(
+                    nc.variables["quality_level"][:, block, :], 5)
+                dat[flags.mask] = np.ma.masked
+            else:
+                dat = np.ma.masked_where(
+                    nc.variables["quality_level"][:, block, :].data == 1,
+                    dat)
+            dat[:, np.ma.getmaskarray(blon) | np.ma.getmaskarray(blat)] = \
+                np.ma.masked
+
+            # Grab the observation time
+            good = dat.nonzero()
+            if not good[0].size:
+                continue
+            dtime = nc.variables["sst_dtime"][:, block, :]
+            time.append(((time0 + dtime) * seapy.secs2day)[good])
+            lon.append(seapy.adddim(blon, len(time0))[good])
+            lat.append(seapy.adddim(blat, len(time0))[good])
+            value.append(dat[good])
+            error.append(err[good])
         nc.close()
+        if not value:
+            return None
 
-        # Set up the coordinate
-        lon = np.ma.masked_where(dat.mask, seapy.adddim(lon, len(time)))
-        lat = np.ma.masked_where(dat.mask, seapy.adddim(lat, len(time)))
-        if self.grid.east():
-            lon[lon < 0] += 360
-        good = dat.nonzero()
         data = [seapy.roms.obs.raw_data("TEMP", self.provenance,
-                                        dat.compressed(),
-                                        err[good], self.temp_error)]
+                                        np.ma.concatenate(value),
+                                        np.ma.concatenate(error),
+                                        self.temp_error)]
         # Grid it
-        return seapy.roms.obs.gridder(self.grid, time[good], lon[good], lat[good],
-                                      None, data, self.dt, title)
+        return seapy.roms.obs.gridder(self.grid, np.ma.concatenate(time),
+                                      np.ma.concatenate(lon),
+                                      np.ma.concatenate(lat),
+                                      None, data, self.dt, title=title)
 
 
 ##############################################################################
@@ -1014,7 +1352,8 @@ class seaglider_profile(obsgen):
                                       pro["lon"][good],
                                       pro["lat"][good],
                                       depth.compressed(),
-                                      data, self.dt, title)
+                                      data, self.dt, depth_adjust=True,
+                                      title=title)
 
 
 class mooring(obsgen):
@@ -1119,7 +1458,8 @@ class mooring(obsgen):
         depth = np.resize(depth, (nt, ndep))
         time = np.resize(time, (nt, ndep))
         return seapy.roms.obs.gridder(self.grid, time, lon, lat, depth,
-                                      obsdata, self.dt, title)
+                                      obsdata, self.dt, depth_adjust=True,
+                                      title=title)
 
 
 class tao_mooring(mooring):
@@ -1191,7 +1531,8 @@ class tao_mooring(mooring):
         depth = np.squeeze(np.transpose(depth, (0, 2, 1)))[~data.mask]
         time = np.squeeze(np.resize(time, (npts, ndep, nt)))[~data.mask]
         return seapy.roms.obs.gridder(self.grid, time, lon, lat, depth,
-                                      obsdata, self.dt, title)
+                                      obsdata, self.dt, depth_adjust=True,
+                                      title=title)
 
 
 class argo_ctd(obsgen):
@@ -1320,4 +1661,5 @@ class argo_ctd(obsgen):
                                         None, self.salt_error)]
 
         return seapy.roms.obs.gridder(self.grid, time, lon, lat, depth,
-                                      data, self.dt, title)
+                                      data, self.dt, depth_adjust=True,
+                                      title=title)
@@ -0,0 +1,296 @@
+#!/usr/bin/env python
+"""
+  qc.py
+
+  State Estimation and Analysis for PYthon
+
+  Module to quality control observations. Each check returns an array of
+  flags that are True for the observations that fail, so that checks may
+  be combined and the failures removed:
+
+  >>> import seapy
+  >>> o = seapy.roms.obs.obs("obs_2010.nc")
+  >>> bad = seapy.roms.qc.gross_range(o) | \
+  >>>       seapy.roms.qc.spike(o, {"TEMP": 2, "SALT": 0.5}) | \
+  >>>       seapy.roms.qc.buddy(o, radius=50, dt=1)
+  >>> o.delete(bad)
+
+  The along-track checks (spike and stuck) follow each platform in time.
+  By default, a platform is each provenance; give the platform of each
+  observation (e.g., the float or ship identifier kept in meta) to follow
+  individual platforms.
+
+  Copyright (c)2020 University of Hawaii under the MIT-License.
+"""
+
+import numpy as np
+import seapy
+
+# Radius of the earth [km]
+_earth_radius = 6371.0
+
+# Number of observations to search for buddies at a time
+_buddy_block = 50000
+
+# Define the default valid range for each type of observation
+gross_limits = {
+    "ZETA": (-4, 4),
+    "UBAR": (-5, 5),
+    "VBAR": (-5, 5),
+    "U": (-5, 5),
+    "V": (-5, 5),
+    "TEMP": (-2.5, 40),
+    "SALT": (0, 42),
+    "RADIAL": (-5, 5)
+}
+
+
+def _by_type(obs, values):
+    """
+    PRIVATE method: look up the value for each observation from a scalar
+    or a dictionary keyed by type (string or integer). Types that are not
+    in the dictionary are given nan.
+    """
+    if not isinstance(values, dict):
+        return np.full(len(obs), values, dtype=float)
+    lookup = np.full(np.max(obs.type) + 1, np.nan)
+    for t, v in values.items():
+        t = seapy.roms.obs.astype(t)[0]
+        if t < lookup.size:
+            lookup[t] = v
+    return lookup[obs.type]
+
+
+def _tracks(obs, platform):
+    """
+    PRIVATE method: order the observations along the track of each
+    platform (and type) in time, and mark the neighbors that are on the
+    same track
+
+    Returns
+    -------
+    order : ndarray,
+        order of the observations along the tracks
+    same : ndarray,
+        True where the observation in order is on the same track as the
+        one before it
+    """
+    if platform is None:
+        platform = obs.provenance
+    platform = np.asarray(platform)
+    if platform.dtype.kind not in "iub":
+        platform = np.unique(platform, return_inverse=True)[1]
+    order = np.lexsort((obs.depth, obs.time, obs.type, platform))
+    same = np.logical_and(np.diff(platform[order]) == 0,
+                          np.diff(obs.type[order]) == 0)
+    return order, same
+
+
+def gross_range(obs, limits=None):
+    """
+    Flag the observations with values outside of the valid range for
+    their type.
+
+    Parameters
+    ----------
+    obs : seapy.roms.obs.obs or string,
+        observations to check
+    limits : dict, optional,
+        (min, max) for each type (string or integer). If None, use
+        seapy.roms.qc.gross_limits. Types without limits are not flagged.
+
+    Returns
+    -------
+    flag : ndarray,
+        True for the observations that fail
+    """
+    obs = seapy.roms.obs.asobs(obs)
+    limits = gross_limits if limits is None else limits
+    lo = _by_type(obs, {t: v[0] for t, v in limits.items()})
+    hi = _by_type(obs, {t: v[1] for t, v in limits.items()})
+    with np.errstate(invalid='ignore'):
+        return np.logical_or(obs.value < lo, obs.value > hi)
+
+
+def climatology(obs, mean, std, nstd=3):
+    """
+    Flag the observations that are more than nstd standard deviations
+    from the climatology. The climatology at the observations can be found
+    from climatology files with seapy.roms.analysis.model_equivalent.
+
+    Parameters
+    ----------
+    obs : seapy.roms.obs.obs or string,
+        observations to check
+    mean : ndarray,
+        climatological mean at each observation
+    std : ndarray,
+        climatological standard deviation at each observation
+    nstd : float or dict, optional,
+        number of standard deviations allowed (or a dictionary of them
+        for each type)
+
+    Returns
+    -------
+    flag : ndarray,
+        True for the observations that fail
+    """
+    obs = seapy.roms.obs.asobs(obs)
+    with np.errstate(invalid='ignore'):
+        return np.abs(obs.value - mean) > _by_type(obs, nstd) * std
+
+
+def spike(obs, threshold, platform=None):
+    """
+    Flag the observations that spike from their neighbors along the track
+    of a platform: the value differs from the mean of its neighbors by
+    more than threshold plus half the difference between the neighbors.
+
+    Parameters
+    ----------
+    obs : seapy.roms.obs.obs or string,
+        observations to check
+    threshold : float or dict,
+        size of a spike (or a dictionary of them for each type)
+    platform : ndarray, optional,
+        platform of each observation. If None, use the provenance.
+
+    Returns
+    -------
+    flag : ndarray,
+        True for the observations that fail
+    """
+    obs = seapy.roms.obs.asobs(obs)
+    order, same = _tracks(obs, platform)
+    v = obs.value[order]
+    test = np.abs(v[1:-1] - (v[:-2] + v[2:]) / 2) - np.abs(v[2:] - v[:-2]) / 2
+    flag = np.zeros(len(obs), dtype=bool)
+    with np.errstate(invalid='ignore'):
+        flag[order[1:-1]] = np.logical_and.reduce((
+            same[:-1], same[1:],
+            test > _by_type(obs, threshold)[order[1:-1]]))
+    return flag
+
+
+def stuck(obs, count=5, tolerance=0, platform=None):
+    """
+    Flag the observations that are part of a run of at least count
+    values along the track of a platform that do not change by more than
+    tolerance.
+
+    Parameters
+    ----------
+    obs : seapy.roms.obs.obs or string,
+        observations to check
+    count : int, optional,
+        number of values in a run to be considered stuck
+    tolerance : float or dict, optional,
+        change in value that is considered stuck (or a dictionary of them
+        for each type)
+    platform : ndarray, optional,
+        platform of each observation. If None, use the provenance.
+
+    Returns
+    -------
+    flag : ndarray,
+        True for the observations that fail
+    """
+    obs = seapy.roms.obs.asobs(obs)
+    order, same = _tracks(obs, platform)
+    v = obs.value[order]
+    tol = _by_type(obs, tolerance)[order[1:]]
+    stay = np.logical_and(same, np.abs(np.diff(v)) <= tol)
+
+    # Find the length of each run of unchanged values
+    start = np.flatnonzero(np.r_[True, ~stay])
+    length = np.diff(np.r_[start, v.size])
+    flag = np.zeros(len(obs), dtype=bool)
+    flag[order] = np.repeat(length >= count, length)
+    return flag
+
+
+def buddy(obs, radius, dt, dz=10, nstd=3, min_buddies=3):
+    """
+    Flag the observations that disagree with their buddies: the
+    observations of the same type within radius, dt, and dz. An
+    observation fails if it differs from the mean of its buddies by more
+    than nstd times the combined standard deviation of its error and of
+    the buddies. The buddies are found with a tree in a space scaled so
+    that the search is an ellipsoid of the given sizes.
+
+    Parameters
+    ----------
+    obs : seapy.roms.obs.obs or string,
+        observations to check
+    radius : float,
+        horizontal distance to search for buddies [km]
+    dt : float,
+        time to search for buddies [days]
+    dz : float, optional,
+        depth to search for buddies [m]
+    nstd : float or dict, optional,
+        number of standard deviations allowed (or a dictionary of them
+        for each type)
+    min_buddies : int, optional,
+        minimum number of buddies needed to check an observation
+
+    Returns
+    -------
+    flag : ndarray,
+        True for the observations that fail
+    """
+    from scipy.spatial import cKDTree
+
+    obs = seapy.roms.obs.asobs(obs)
+
+    # Place the observations on the sphere [km], scale time and depth to
+    # the radius, and separate the types beyond any search
+    lat = np.radians(obs.lat)
+    lon = np.radians(obs.lon)
+    far = 10 * (2 * _earth_radius + radius)
+    pts = np.column_stack((
+        _earth_radius * np.cos(lat) * np.cos(lon),
+        _earth_radius * np.cos(lat) * np.sin(lon),
+        _earth_radius * np.sin(lat),
+        (obs.time - np.min(obs.time)) * radius / dt,
+        obs.depth * radius / dz,
+        obs.type * far))
+    del lat, lon
+
+    # Gather the statistics of the buddies of each observation. Rather
+    # than build every pair at once, work through blocks of the
+    # observations in time: find the pairs within each block and the pairs
+    # with the later observations that lie within dt of it, so that each
+    # pair is found only once.
+    n = len(obs)
+    order = np.argsort(pts[:, 3], kind='stable')
+    pts = pts[order]
+    num = np.zeros(n)
+    total = np.zeros(n)
+    total2 = np.zeros(n)
+    for blk in range(0, n, _buddy_block):
+        end = min(n, blk + _buddy_block)
+        last = np.searchsorted(pts[:, 3], pts[end - 1, 3] + radius, 'right')
+        tree = cKDTree(pts[blk:end])
+        pairs = tree.query_pairs(radius, output_type='ndarray') + blk
+        i, j = pairs[:, 0], pairs[:, 1]
+        if last > end:
+            pairs = tree.sparse_distance_matrix(
+                cKDTree(pts[end:last]), radius, output_type='ndarray')
+            i = np.hstack((i, pairs['i'] + blk))
+            j = np.hstack((j, pairs['j'] + end))
+        i, j = order[i], order[j]
+        num += np.bincount(i, minlength=n) + np.bincount(j, minlength=n)
+        total += np.bincount(i, obs.value[j], minlength=n) + \
+            np.bincount(j, obs.value[i], minlength=n)
+        total2 += np.bincount(i, obs.value[j]**2, minlength=n) + \
+            np.bincount(j, obs.value[i]**2, minlength=n)
+        del tree, pairs, i, j
+    del pts, order
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / num
+        var = np.maximum(total2 / num - mean**2, 0)
+        return np.logical_and(
+            num >= min_buddies,
+            np.abs(obs.value - mean) >
+            _by_type(obs, nstd) * np.sqrt(var + obs.error))
@@ -0,0 +1,224 @@
+#!/usr/bin/env python
+"""
+  superob.py
+
+  State Estimation and Analysis for PYthon
+
+  Module to reduce dense observations (HF radar, swaths, gliders, etc.) to
+  a target spacing in space and time, either by combining them into
+  super-observations or by thinning them. The observations are hashed
+  into bins of the given size and grouped with a single sort, so that
+  very large sets are handled without loops. The bins may be set for
+  each type of observation:
+
+  >>> import seapy
+  >>> rules = {"TEMP": seapy.roms.superob.rule(dx=2, dz=5),
+  >>>          "UBAR": seapy.roms.superob.rule(dx=6, dt=1/24, inflate=2)}
+  >>> s = seapy.roms.superob.superob(o, dx=10, dt=0.25, rules=rules)
+
+  Copyright (c)2020 University of Hawaii under the MIT-License.
+"""
+
+import numpy as np
+import seapy
+from collections import namedtuple
+from warnings import warn
+
+# Size of a degree of latitude [km]
+_km_per_deg = 111.195
+
+# Define a named tuple of the bins to use for a type of observation: dx is
+# the horizontal size [km], dt the length in time [days], dz the vertical
+# size [m] (if None, only observations at the same depth are combined),
+# and inflate the factor applied to the errors. Any field that is None
+# uses the value given for all observations.
+rule = namedtuple('rule', 'dx dt dz inflate', defaults=(None,) * 4)
+
+
+def _bins(obs, dx, dt, dz, inflate, rules):
+    """
+    PRIVATE method: hash the observations into their bins and group them.
+    Observations of different type or provenance are never grouped.
+
+    Returns
+    -------
+    order : ndarray,
+        order of the observations that groups the bins together
+    start : ndarray,
+        position in order of the first observation of each bin
+    count : ndarray,
+        number of observations in each bin
+    inflate : ndarray,
+        factor to inflate the errors of each observation
+    """
+    # Look up the settings for each observation by its type
+    types = seapy.roms.obs.astype(list(rules)) if rules else []
+    ntype = max([np.max(obs.type), *types]) + 1
+    lookup = {f: np.full(ntype, np.nan) for f in rule._fields}
+    for f, v in zip(rule._fields, (dx, dt, dz, inflate)):
+        if v is not None:
+            lookup[f][:] = v
+    for t, r in rules.items():
+        t = seapy.roms.obs.astype(t)[0]
+        for f, v in zip(rule._fields, r):
+            if v is not None:
+                lookup[f][t] = v
+    for f in ("dx", "dt"):
+        if np.any(np.isnan(lookup[f][np.unique(obs.type)])):
+            raise ValueError("No {:s} is given for some types".format(f))
+    dx, dt, dz, inflate = (v[obs.type] for v in lookup.values())
+    inflate[np.isnan(inflate)] = 1
+
+    # Hash the positions: rows of latitude, and longitude bins within each
+    # row that are scaled to the latitude of the row
+    jb = np.floor(obs.lat * _km_per_deg / dx)
+    lat = (jb + 0.5) * dx / _km_per_deg
+    ib = np.floor(obs.lon * _km_per_deg *
+                  np.cos(np.radians(lat)) / dx)
+    del lat
+    tb = np.floor(obs.time / dt)
+    kb = np.floor(obs.depth / dz)
+    nodz = np.isnan(dz)
+    if np.any(nodz):
+        kb[nodz] = np.unique(obs.depth[nodz], return_inverse=True)[1]
+
+    keys = [obs.type, obs.provenance, tb, kb, jb, ib]
+    del tb, kb, jb, ib
+    keys = [(k - np.min(k)).astype(np.int64) for k in keys]
+    try:
+        key = np.ravel_multi_index(keys, [np.max(k) + 1 for k in keys])
+        order = np.argsort(key, kind='mergesort')
+        new = np.diff(key[order]) != 0
+    except ValueError:
+        # Too many bins to hash into a single key
+        order = np.lexsort(keys[::-1])
+        new = np.any([np.diff(k[order]) != 0 for k in keys], axis=0)
+    start = np.flatnonzero(np.r_[True, new])
+    count = np.diff(np.r_[start, order.size])
+    return order, start, count, inflate
+
+
+def superob(obs, dx, dt, dz=None, inflate=1, rules=None):
+    """
+    Combine the observations within each bin of space and time into a
+    single super-observation. The value is the mean weighted by the
+    inverse of the errors, the location and time are the mean of the
+    observations, and the error is the larger of the mean error and the
+    variance of the values within the bin, multiplied by inflate.
+
+    Parameters
+    ----------
+    obs : seapy.roms.obs.obs or string,
+        observations to combine
+    dx : float,
+        horizontal size of the bins [km]
+    dt : float,
+        length of the bins in time [days]
+    dz : float, optional,
+        vertical size of the bins [m]. If None, only observations at the
+        same depth are combined.
+    inflate : float, optional,
+        factor to inflate the errors of the super-observations
+    rules : dict, optional,
+        seapy.roms.superob.rule to use for each type of observation,
+        with the type (string or integer) as the key
+
+    Returns
+    -------
+    obs : seapy.roms.obs.obs,
+        super-observations
+
+    Examples
+    --------
+    Combine the HF radar radials into 6 km, hourly bins
+
+    >>> s = seapy.roms.superob.superob("radar_obs.nc", dx=6, dt=1/24)
+    """
+    obs = seapy.roms.obs.asobs(obs)
+    if not len(obs):
+        warn("No observations to combine")
+        return None
+    order, start, count, inflate = _bins(obs, dx, dt, dz, inflate,
+                                         rules or {})
+
+    def _sum(x):
+        return np.add.reduceat(x[order], start)
+
+    # Weight the values by the inverse of their errors
+    weight = 1 / obs.error[order]
+    values = obs.value[order]
+    wsum = np.add.reduceat(weight, start)
+    value = np.add.reduceat(weight * values, start) / wsum
+    spread = np.add.reduceat(
+        weight * (values - np.repeat(value, count))**2, start) / wsum
+    error = np.maximum(_sum(obs.error) / count, spread) * \
+        inflate[order[start]]
+    del weight, values
+
+    first = order[start]
+    return seapy.roms.obs.obs(time=_sum(obs.time) / count,
+                              x=_sum(obs.x) / count,
+                              y=_sum(obs.y) / count,
+                              z=_sum(obs.z) / count,
+                              lat=_sum(obs.lat) / count,
+                              lon=_sum(obs.lon) / count,
+                              depth=_sum(obs.depth) / count,
+                              value=value,
+                              error=error,
+                              type=obs.type[first],
+                              provenance=obs.provenance[first],
+                              meta=obs.meta[first],
+                              title=obs.title)
+
+
+def thin(obs, dx, dt, dz=None, inflate=1, rules=None):
+    """
+    Thin the observations by keeping only the one with the smallest error
+    within each bin of space and time. The errors of the kept observations
+    are multiplied by inflate.
+
+    Parameters
+    ----------
+    obs : seapy.roms.obs.obs or string,
+        observations to thin
+    dx : float,
+        horizontal size of the bins [km]
+    dt : float,
+        length of the bins in time [days]
+    dz : float, optional,
+        vertical size of the bins [m]. If None, only observations at the
+        same depth are thinned.
+    inflate : float, optional,
+        factor to inflate the errors of the kept observations
+    rules : dict, optional,
+        seapy.roms.superob.rule to use for each type of observation,
+        with the type (string or integer) as the key
+
+    Returns
+    -------
+    obs : seapy.roms.obs.obs,
+        thinned observations
+
+    Examples
+    --------
+    Keep one glider observation for every 2 km, 5 m, and 3 hours
+
+    >>> t = seapy.roms.superob.thin(glider, dx=2, dt=1/8, dz=5)
+    """
+    obs = seapy.roms.obs.asobs(obs)
+    if not len(obs):
+        warn("No observations to thin")
+        return None
+    order, start, count, inflate = _bins(obs, dx, dt, dz, inflate,
+                                         rules or {})
+
+    # Find the first observation of each bin with the smallest error
+    error = obs.error[order]
+    best = np.flatnonzero(error == np.repeat(
+        np.minimum.reduceat(error, start), count))
+    group = np.searchsorted(start, best, side='right') - 1
+    keep = np.sort(order[best[np.r_[True, np.diff(group) > 0]]])
+
+    new = obs[keep]
+    new.error = new.error * inflate[keep]
+    return new